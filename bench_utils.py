@@ -0,0 +1,51 @@
+# Спільні вимірювання для бенчмарків: статистики вибірки часів та запуск функції з розігрівом
+import gc
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'repeats': len(ordered),
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'mean': statistics.fmean(ordered),
+        'stdev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'p90': float(np.percentile(ordered, 90)),
+        'p99': float(np.percentile(ordered, 99)),
+        'max': ordered[-1],
+    }
+
+
+# Розігрів, повтори з perf_counter при вимкненому gc та окремий прогін для піку пам'яті,
+# щоб tracemalloc не впливав на виміряний час
+def measure(fn, repeats=7, warmup=2, track_memory=True):
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    gc.collect()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    result = summarize(samples)
+    if track_memory:
+        tracemalloc.start()
+        try:
+            fn()
+            result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
@@ -0,0 +1,128 @@
+import numpy as np
+
+# Проріджування довгих рівномірно дискретизованих сигналів для відображення.
+#
+# SignalPyramid один раз будує багаторівневу піраміду огинаючих: рівень k зберігає для
+# кожного відра з factor**k сусідніх відліків індекси мінімуму та максимуму. Запит на
+# видиму ділянку бере найгрубший рівень, що ще має не менше відер, ніж пікселів по
+# ширині, і зводить його до однієї пари min/max на стовпчик пікселів, тому кількість
+# точок обмежена шириною екрана, а вартість запиту не залежить від довжини сигналу.
+
+DEFAULT_FACTOR = 8
+MIN_BUCKETS = 1024
+
+
+# Індекси мінімуму та максимуму в кожній групі з size сусідніх відліків y[start:stop]
+def _raw_extrema(y, start, stop, size):
+    full = start + (stop - start) // size * size
+    block = y[start:full].reshape(-1, size)
+    base = np.arange(start, full, size)
+    mins = base + np.argmin(block, axis=1)
+    maxs = base + np.argmax(block, axis=1)
+    if full < stop:
+        tail = y[full:stop]
+        mins = np.append(mins, full + np.argmin(tail))
+        maxs = np.append(maxs, full + np.argmax(tail))
+    return mins, maxs
+
+
+# Об'єднання груп з size сусідніх відер рівня; неповна остання група доповнюється
+# повтором свого останнього відра
+def _group_extrema(y, min_idx, max_idx, size):
+    count = -(-len(min_idx) // size)
+    pad = count * size - len(min_idx)
+    if pad:
+        min_idx = np.concatenate((min_idx, np.repeat(min_idx[-1:], pad)))
+        max_idx = np.concatenate((max_idx, np.repeat(max_idx[-1:], pad)))
+    mins = min_idx.reshape(count, size)
+    maxs = max_idx.reshape(count, size)
+    rows = np.arange(count)
+    return mins[rows, np.argmin(y[mins], axis=1)], maxs[rows, np.argmax(y[maxs], axis=1)]
+
+
+# Межі [start, stop) відліків, що потрапляють у видимий інтервал [x0, x1] зростаючої осі x
+def index_range(x, x0, x1):
+    start = int(np.searchsorted(x, x0, side='left'))
+    stop = int(np.searchsorted(x, x1, side='right'))
+    # Сусідні відліки за межами вікна, щоб лінія доходила до країв графіка
+    return max(start - 1, 0), min(stop + 1, len(x))
+
+
+# Largest-Triangle-Three-Buckets: з кожного відра береться точка, що утворює найбільший
+# трикутник з попередньою вибраною точкою та середнім наступного відра
+def lttb_indices(x, y, n_out):
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    result = np.empty(n_out, dtype=np.int64)
+    result[0] = 0
+    result[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        low, high = edges[i], edges[i + 1]
+        next_high = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[high:next_high].mean()
+        avg_y = y[high:next_high].mean()
+        area = np.abs((x[a] - avg_x) * (y[low:high] - y[a]) - (x[a] - x[low:high]) * (avg_y - y[a]))
+        a = low + int(np.argmax(area))
+        result[i + 1] = a
+    return result
+
+
+class SignalPyramid:
+    def __init__(self, y, factor=DEFAULT_FACTOR, min_buckets=MIN_BUCKETS):
+        self.y = np.asarray(y)
+        self.factor = factor
+        # levels[k - 1] містить (мінімуми, максимуми) відер розміром factor**k
+        self.levels = []
+        index_dtype = np.int32 if len(self.y) < 2 ** 31 else np.int64
+        if len(self.y) > min_buckets:
+            mins, maxs = _raw_extrema(self.y, 0, len(self.y), factor)
+            self.levels.append((mins.astype(index_dtype), maxs.astype(index_dtype)))
+        while self.levels and len(self.levels[-1][0]) > min_buckets:
+            mins, maxs = _group_extrema(self.y, *self.levels[-1], factor)
+            self.levels.append((mins, maxs))
+
+    def __len__(self):
+        return len(self.y)
+
+    def nbytes(self):
+        return sum(mins.nbytes + maxs.nbytes for mins, maxs in self.levels)
+
+    # Кандидати з найгрубшого рівня, у якого на ділянці [start, stop) не менше width відер
+    def _candidates(self, start, stop, width):
+        level = 0
+        while level < len(self.levels) and (stop - start) // self.factor ** (level + 1) >= width:
+            level += 1
+        if level == 0:
+            return None
+        size = self.factor ** level
+        mins, maxs = self.levels[level - 1]
+        first, last = start // size, -(-stop // size)
+        return mins[first:last], maxs[first:last]
+
+    # Індекси точок для відображення ділянки [start, stop) на width пікселів:
+    # 'minmax' дає огинаючу з мінімуму та максимуму на кожен піксель (до 2 * width точок),
+    # 'lttb' вибирає width точок з цієї огинаючої
+    def indices(self, start, stop, width, method='minmax'):
+        start, stop = max(start, 0), min(stop, len(self.y))
+        if stop - start <= 2 * width:
+            return np.arange(start, stop)
+
+        candidates = self._candidates(start, stop, width)
+        if candidates is None:
+            mins, maxs = _raw_extrema(self.y, start, stop, -(-(stop - start) // width))
+        else:
+            mins, maxs = _group_extrema(self.y, *candidates, -(-len(candidates[0]) // width))
+        index = np.unique(np.concatenate(([start, stop - 1], mins, maxs)))
+        if method == 'lttb':
+            index = index[lttb_indices(index.astype(np.float64), self.y[index], width)]
+        return index
+
+
+# Спільні індекси для кількох сигналів на одній осі: огинаючі всіх сигналів зберігаються,
+# тому їх можна малювати з одного джерела даних
+def union_indices(pyramids, start, stop, width, method='minmax'):
+    return np.unique(np.concatenate([pyramid.indices(start, stop, width, method) for pyramid in pyramids]))
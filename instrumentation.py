@@ -0,0 +1,303 @@
+import atexit
+import bisect
+import cProfile
+import json
+import multiprocessing
+import os
+import threading
+import time
+import tracemalloc
+import warnings
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Необов'язкові вимірювання гарячих шляхів застосунків.
+#
+# Етапи позначаються як stage('lab_3.filter') або @timed('lab_3.filter'): тривалість
+# потрапляє в гістограму етапу, observe_size записує розмір відповіді, а register_cache
+# підключає LRUCache чи functools.lru_cache для частки влучень. Без APP_METRICS=1 (або
+# enable()) stage повертає спільний порожній контекст і нічого не записується.
+#
+# Змінні оточення:
+#   APP_METRICS=1             увімкнути вимірювання
+#   APP_METRICS_PORT=9464     віддавати /metrics у текстовому форматі Prometheus на localhost
+#   APP_METRICS_FILE=m.json   записати JSON під час завершення процесу
+#   APP_PROFILE=cpu,memory    cProfile та/або tracemalloc на весь процес
+#   APP_PROFILE_DIR=profiles  тека для app.prof та app_memory.txt при завершенні
+#
+# Сервер, файл метрик і профілювання налаштовуються лише в головному процесі: дочірні
+# процеси пулів (spawn, forkserver) імпортують модуль заново і не мають займати порт
+# чи перезаписувати файли батьківського процесу.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = tuple(2 ** power for power in range(8, 31, 2))
+TRACEMALLOC_TOP = 30
+
+_NULL_CONTEXT = nullcontext()
+
+
+# Кумулятивна гістограма з фіксованими межами, як histogram у Prometheus
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    # Оцінка квантиля за верхньою межею кошика
+    def quantile(self, q):
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if count and seen >= target:
+                return bound
+        return self.max
+
+    def to_dict(self):
+        with self._lock:
+            return {'count': self.count, 'sum': self.sum, 'max': self.max,
+                    'mean': self.sum / self.count if self.count else None,
+                    'p50': self.quantile(0.5), 'p90': self.quantile(0.9), 'p99': self.quantile(0.99),
+                    'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], self.counts))}
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.latencies = {}
+        self.sizes = {}
+        self.caches = {}
+        # Лічильники functools.lru_cache не скидаються без очищення кешу, тому
+        # reset запам'ятовує їхні значення, а cache_stats віднімає їх
+        self._cache_baselines = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, table, name, buckets):
+        histogram = table.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = table.setdefault(name, Histogram(buckets))
+        return histogram
+
+    def observe_latency(self, name, seconds):
+        self._histogram(self.latencies, name, LATENCY_BUCKETS).observe(seconds)
+
+    def observe_size(self, name, nbytes):
+        self._histogram(self.sizes, name, SIZE_BUCKETS).observe(nbytes)
+
+    def cache_stats(self):
+        stats = {}
+        for name, cache in self.caches.items():
+            if hasattr(cache, 'cache_info'):
+                info = cache.cache_info()
+                base_hits, base_misses = self._cache_baselines.get(name, (0, 0))
+                hits, misses, size = info.hits - base_hits, info.misses - base_misses, info.currsize
+            else:
+                hits, misses, size = cache.hits, cache.misses, len(cache)
+            total = hits + misses
+            stats[name] = {'hits': hits, 'misses': misses, 'size': size,
+                           'hit_rate': hits / total if total else None}
+            if getattr(cache, 'maxbytes', None) is not None:
+                stats[name]['nbytes'] = cache.nbytes
+        return stats
+
+    def to_dict(self):
+        return {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'pid': os.getpid(),
+                'latency_seconds': {name: h.to_dict() for name, h in sorted(self.latencies.items())},
+                'payload_bytes': {name: h.to_dict() for name, h in sorted(self.sizes.items())},
+                'caches': self.cache_stats()}
+
+    def to_prometheus(self):
+        lines = []
+        for metric, table, description in (('app_stage_latency_seconds', self.latencies, "Stage latency"),
+                                           ('app_payload_bytes', self.sizes, "Payload size")):
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} histogram"]
+            for name, histogram in sorted(table.items()):
+                data = histogram.to_dict()
+                cumulative = 0
+                for bound, count in data['buckets'].items():
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {data["sum"]}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {data["count"]}')
+        for metric in ('hits', 'misses'):
+            lines += [f"# TYPE app_cache_{metric}_total counter"]
+            lines += [f'app_cache_{metric}_total{{cache="{name}"}} {stats[metric]}'
+                      for name, stats in sorted(self.cache_stats().items())]
+        return "\n".join(lines) + "\n"
+
+    # Обнуляє гістограми та лічильники зареєстрованих кешів; вміст кешів не змінюється
+    def reset(self):
+        with self._lock:
+            self.latencies.clear()
+            self.sizes.clear()
+            for name, cache in self.caches.items():
+                if hasattr(cache, 'cache_info'):
+                    info = cache.cache_info()
+                    self._cache_baselines[name] = (info.hits, info.misses)
+                else:
+                    cache.reset_stats()
+
+
+metrics = Metrics()
+
+
+def enable():
+    metrics.enabled = True
+
+
+def disable():
+    metrics.enabled = False
+
+
+def enabled():
+    return metrics.enabled
+
+
+@contextmanager
+def _timer(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe_latency(name, time.perf_counter() - start)
+
+
+def stage(name):
+    return _timer(name) if metrics.enabled else _NULL_CONTEXT
+
+
+def timed(name):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe_latency(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def observe_latency(name, seconds):
+    if metrics.enabled:
+        metrics.observe_latency(name, seconds)
+
+
+def observe_size(name, nbytes):
+    if metrics.enabled:
+        metrics.observe_size(name, nbytes)
+
+
+# Кеш опитується лише під час вивантаження метрик, тому реєстрація нічого не коштує
+def register_cache(name, cache):
+    metrics.caches[name] = cache
+    metrics._cache_baselines.pop(name, None)
+    return cache
+
+
+def dump_json(path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(metrics.to_dict(), f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith('/metrics.json'):
+            body, content_type = json.dumps(metrics.to_dict()).encode(), 'application/json'
+        elif self.path.startswith('/metrics'):
+            body, content_type = metrics.to_prometheus().encode(), 'text/plain; version=0.0.4'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Локальний HTTP сервер метрик у фоновому потоці: /metrics (Prometheus) та /metrics.json
+def start_http_server(port, host='127.0.0.1'):
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
+
+
+_profile = {'cpu': None, 'memory': False, 'dir': '.'}
+
+
+# cProfile бачить лише потік, що його запустив; час у робочих потоках видно з гістограм stage
+def start_profiling(cpu=True, memory=False, directory='.'):
+    _profile['dir'] = directory
+    if cpu and _profile['cpu'] is None:
+        _profile['cpu'] = cProfile.Profile()
+        _profile['cpu'].enable()
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _profile['memory'] = True
+
+
+def dump_profile(prefix='app'):
+    os.makedirs(_profile['dir'], exist_ok=True)
+    paths = []
+    profiler = _profile['cpu']
+    if profiler is not None:
+        profiler.disable()
+        path = os.path.join(_profile['dir'], prefix + '.prof')
+        profiler.dump_stats(path)
+        paths.append(path)
+        profiler.enable()
+    if _profile['memory'] and tracemalloc.is_tracing():
+        path = os.path.join(_profile['dir'], prefix + '_memory.txt')
+        current, peak = tracemalloc.get_traced_memory()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"current {current} bytes, peak {peak} bytes\n")
+            for statistic in tracemalloc.take_snapshot().statistics('lineno')[:TRACEMALLOC_TOP]:
+                f.write(f"{statistic}\n")
+        paths.append(path)
+    return paths
+
+
+def configure_from_env(environ=os.environ):
+    if environ.get('APP_METRICS', '') not in ('', '0'):
+        enable()
+    if multiprocessing.parent_process() is not None:
+        return
+    if environ.get('APP_METRICS_PORT'):
+        enable()
+        port = int(environ['APP_METRICS_PORT'])
+        try:
+            start_http_server(port)
+        except OSError as e:
+            warnings.warn(f"metrics server was not started on port {port}: {e}", RuntimeWarning)
+    if environ.get('APP_METRICS_FILE'):
+        enable()
+        atexit.register(dump_json, environ['APP_METRICS_FILE'])
+
+    modes = {mode.strip() for mode in environ.get('APP_PROFILE', '').split(',') if mode.strip()}
+    if modes:
+        start_profiling('cpu' in modes, 'memory' in modes, environ.get('APP_PROFILE_DIR', '.'))
+        atexit.register(dump_profile)
+
+
+configure_from_env()
@@ -1,35 +1,10 @@
+import cherrypy
+from matplotlib.figure import Figure
 from spyre import server
-import matplotlib.pyplot as plt
-import pandas as pd
-import seaborn as sns
-import glob
-
-def create_data_frame(folder_path):
-    csv_files = glob.glob(folder_path + "/*.csv")
-    headers = ['Year', 'Week', 'SMN', 'SMT', 'VCI', 'TCI', 'VHI', 'empty']
-    frames = []
-
-    for file in csv_files:
-        try:
-            region_id = int(file.split('__')[1])
-            df = pd.read_csv(file, header=1, names=headers)
-            df.at[0, 'Year'] = df.at[0, 'Year'][9:]
-            df = df.drop(df.index[-1])
-            df = df[df['VHI'] != -1]
-            df = df.drop('empty', axis=1)
-            df.insert(0, 'region_id', region_id, True)
-            df['Week'] = df['Week'].astype(int)
-            frames.append(df)
-        except Exception as e:
-            print(f"Error processing file {file}: {e}")
-    result = pd.concat(frames).drop_duplicates().reset_index(drop=True)
-    result = result.loc[(result.region_id != 12) & (result.region_id != 20)]
-    result = result.replace({'region_id': {1: 22, 2: 24, 3: 23, 4: 25, 5: 3, 6: 4, 7: 8, 8: 19, 9: 20, 10: 21,
-                                           11: 9, 13: 10, 14: 11, 15: 12, 16: 13, 17: 14, 18: 15, 19: 16, 21: 17,
-                                           22: 18, 23: 6, 24: 1, 25: 2, 26: 6, 27: 5}})
-    return result
-
-df = create_data_frame('download')
+from instrumentation import observe_size, register_cache, stage, timed
+from vhi_data import create_data_frame
+from vhi_plot import FIGSIZE, PlotRenderer, draw_plot
+from vhi_query import VhiIndex
 
 reg_id_name = {
     1: 'Вінницька', 2: 'Волинська', 3: 'Дніпропетровська', 4: 'Донецька', 5: 'Житомирська',
@@ -39,11 +14,17 @@ reg_id_name = {
     21: 'Хмельницька', 22: 'Черкаська', 23: 'Чернівецька', 24: 'Чернігівська', 25: 'Республіка Крим'
 }
 
-class DataApp(server.App):
-    title = "Лабораторна 3"
+# Дані читаються лише при запуску застосунку, а не під час імпорту: дочірні процеси
+# пулу (spawn, forkserver) імпортують головний модуль заново. Кількість процесів
+# create_data_frame вибирає сам за кількістю файлів
+def load_data(folder_path='download'):
+    with stage('lab_3.load'):
+        return create_data_frame(folder_path)
 
-    # Вхідні параметри для інтерфейсу
-    inputs = [
+
+# Вхідні параметри для інтерфейсу, межі регіонів та років беруться з даних
+def data_inputs(df):
+    return [
         {
             "type": "radiobuttons",
             "label": "Виберіть Параметри",
@@ -99,6 +80,10 @@ class DataApp(server.App):
         }
     ]
 
+
+class DataApp(server.App):
+    title = "Лабораторна 3"
+
     controls = [{"type": "button", "label": "Оновити Дані", "id": "update_data"}]
 
     tabs = ["Таблиця", "Графік"]
@@ -108,41 +93,53 @@ class DataApp(server.App):
         {"type": "plot", "id": "plot", "control_id": "update_data", "tab": "Графік", "on_page_load": True},
     ]
 
+    def __init__(self, df):
+        self.inputs = data_inputs(df)
+        self.index = VhiIndex(df)
+        self.renderer = PlotRenderer()
+        register_cache('lab_3.query', self.index.cache)
+        register_cache('lab_3.plot_png', self.renderer.cache)
+
+    # Нормалізовані параметри запиту, спільний ключ для індексу та кешу графіків
+    def query_key(self, params):
+        return (params["parameter"], int(params["region"]), int(params["year_start"]), int(params["year_end"]),
+                int(params["weeks_start"]), int(params["weeks_end"]))
+
+    @timed('lab_3.filter')
     def filter_data(self, params):
-        parameter = params["parameter"]
-        region_id = int(params["region"])
-        year_start = int(params["year_start"])
-        year_end = int(params["year_end"])
-        weeks_start = int(params["weeks_start"])
-        weeks_end = int(params["weeks_end"])
-
-        df_filtered = df[(df['Year'].astype(int).between(year_start, year_end)) &
-                         (df['Week'].between(weeks_start, weeks_end)) &
-                         (df['region_id'] == region_id)][['Year', 'Week', parameter]]
-        return df_filtered
+        return self.index.query(*self.query_key(params))
 
     def getData(self, params):
         return self.filter_data(params)
 
-    def getPlot(self, params):
-        df_filtered = self.filter_data(params)
-        parameter = params["parameter"]
-        region_id = int(params["region"])
-
-        fig, ax = plt.subplots(figsize=(14, 7))
-        colors = sns.color_palette("husl", len(df_filtered['Year'].unique()))
-
-        for i, year in enumerate(df_filtered['Year'].unique()):
-            df_year = df_filtered[df_filtered['Year'] == year]
-            ax.plot(df_year['Week'], df_year[parameter], label=f"{parameter} - {year}", color=colors[i])
-
-        ax.set_title(f"Графік для {reg_id_name[region_id]}", fontsize=16, fontweight='bold')
-        ax.set_xlabel("Тижні", fontsize=14)
-        ax.set_ylabel("Значення", fontsize=14)
-        ax.legend(title='Параметр і Рік', fontsize=12, title_fontsize=14)
-        ax.grid(True, linestyle='--', alpha=0.6)
+    def plot_args(self, key):
+        return self.index.query(*key), key[0], f"Графік для {reg_id_name[key[1]]}"
 
+    def getPlot(self, params):
+        fig = Figure(figsize=FIGSIZE)
+        draw_plot(fig, *self.plot_args(self.query_key(params)))
         return fig
 
-app = DataApp()
-app.launch()
+    @timed('lab_3.plot')
+    def getPlotPng(self, params):
+        key = self.query_key(params)
+        png = self.renderer.png(key, lambda: self.plot_args(key))
+        observe_size('lab_3.plot_png', len(png))
+        return png
+
+    # spyre зберігає фігуру з getPlot через model.Plot; тут /plot віддає готовий PNG з кешу
+    def getRoot(self):
+        webapp = super().getRoot()
+
+        @cherrypy.expose
+        def plot(**args):
+            png = self.getPlotPng(webapp.clean_args(args))
+            cherrypy.response.headers['Content-Type'] = 'image/png'
+            return png
+
+        webapp.plot = plot
+        return webapp
+
+if __name__ == '__main__':
+    app = DataApp(load_data('download'))
+    app.launch()
@@ -1,9 +1,12 @@
+import sys
 import tkinter as tk
 from tkinter import ttk
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from scipy.signal import butter, filtfilt
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from decimation import SignalPyramid, index_range, union_indices
+from instrumentation import stage, timed
+from signal_filters import StreamingLowpass, lowpass_filter
 
 # Функція для створення гармонічного сигналу
 def harmonic(t, amplitude, frequency, phase):
@@ -23,21 +26,34 @@ def harmonic_with_noise(t, amplitude, frequency, phase=0, noise_mean=0, noise_co
     else:
         return harmonic_signal
 
-# Функція для створення фільтра низьких частот
-def butter_lowpass(cutoff, fs, order=5):
-    nyq = 0.5 * fs
-    normal_cutoff = cutoff / nyq
-    b, a = butter(order, normal_cutoff, btype='low', analog=False)
-    return b, a
+# Етапи обчислення сигналів та етапи, які від них залежать
+STAGE_DEPENDENTS = {
+    'noise': ('noise_signal',),
+    'harmonic': ('noise_signal',),
+    'noise_signal': ('filtered',),
+    'filtered': ('view',),
+    'view': (),
+}
 
-# Функція для застосування фільтра низьких частот до даних
-def lowpass_filter(data, cutoff_freq, fs, order=5):
-    b, a = butter_lowpass(cutoff_freq, fs, order=order)
-    y = filtfilt(b, a, data)
-    return y
+# Інтервал об'єднання подій повзунків, приблизно один кадр при 60 Гц
+FRAME_INTERVAL_MS = 16
+
+# Довші сигнали малюються огинаючою видимої ділянки: не більше двох точок на стовпчик
+# пікселів для кожної лінії, вибраних з піраміди, побудованої один раз на сигнал
+DECIMATE_MIN_SAMPLES = 10000
+
+# Потоковий режим: кожні STREAM_PERIOD_MS у кінець вікна додаються нові відліки в темпі
+# реального часу, фільтр нижніх частот обробляє лише їх, переносячи стан між порціями
+STREAM_PERIOD_MS = 50
+
+# Зсув буфера фіксованої довжини на len(block) відліків з додаванням block у кінець
+def shift_in(buffer, block):
+    if len(block) >= len(buffer):
+        return np.array(block[len(block) - len(buffer):], dtype=np.float64)
+    return np.concatenate((buffer[len(block):], block))
 
 class SignalApp:
-    def __init__(self, root):
+    def __init__(self, root, samples=1000):
         self.root = root
         self.root.title("Signal Processing Application")
 
@@ -45,12 +61,19 @@ class SignalApp:
         self.canvas = FigureCanvasTkAgg(self.fig, master=root)
         self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
 
+        # Панель масштабування та зсуву під графіком
+        self.toolbar = NavigationToolbar2Tk(self.canvas, root, pack_toolbar=False)
+        self.toolbar.update()
+        self.toolbar.pack(side=tk.TOP, fill=tk.X)
+
         self.controls_frame = ttk.Frame(root)
         self.controls_frame.pack(side=tk.BOTTOM, fill=tk.X)
 
         self.init_controls()
 
-        self.t = np.linspace(0, 10, 1000)
+        self.t = np.linspace(0, 10, samples)
+        self.decimate = samples > DECIMATE_MIN_SAMPLES
+        self.pyramids = {}
         self.sampling_frequency = 1 / (self.t[1] - self.t[0])
 
         self.initial_amplitude = 1.0
@@ -60,6 +83,13 @@ class SignalApp:
         self.initial_noise_covariance = 0.1
         self.noise_g = create_noise(self.t, self.initial_noise_mean, self.initial_noise_covariance)
 
+        self.pending_redraw = None
+        self.background = None
+        self.autoscale_y = True
+        self.setting_limits = False
+        self.stream_state = {'after': None, 'sample': 0, 'lowpass': None}
+        self.dirty = set(STAGE_DEPENDENTS)
+        self.init_plot()
         self.plot_signals()
 
     def init_controls(self):
@@ -88,52 +118,205 @@ class SignalApp:
         ttk.Scale(self.controls_frame, from_=0.1, to=10.0, variable=self.cutoff_frequency_var, orient=tk.HORIZONTAL, command=self.update_filter).pack(side=tk.LEFT, padx=5)
 
         self.show_noise_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(self.controls_frame, text="Show Noise", variable=self.show_noise_var, command=self.update).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(self.controls_frame, text="Show Noise", variable=self.show_noise_var, command=self.update_show_noise).pack(side=tk.LEFT, padx=5)
+
+        self.streaming_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.controls_frame, text="Streaming", variable=self.streaming_var, command=self.toggle_streaming).pack(side=tk.LEFT, padx=5)
 
         ttk.Button(self.controls_frame, text="Regenerate Noise", command=self.regenerate_noise).pack(side=tk.LEFT, padx=5)
         ttk.Button(self.controls_frame, text="Random Params", command=self.random_params).pack(side=tk.LEFT, padx=5)
         ttk.Button(self.controls_frame, text="Reset", command=self.reset).pack(side=tk.LEFT, padx=5)
 
-    def plot_signals(self):
-        self.ax.clear()
-
-        amplitude = self.amplitude_var.get()
-        frequency = self.frequency_var.get()
-        phase = self.phase_var.get()
-        noise_mean = self.noise_mean_var.get()
-        noise_covariance = self.noise_covariance_var.get()
-        cutoff_frequency = self.cutoff_frequency_var.get()
-        show_noise = self.show_noise_var.get()
-
-        harmonic_signal = harmonic(self.t, amplitude, frequency, phase)
-        noise_signal = harmonic_with_noise(self.t, amplitude, frequency, phase, noise_mean, noise_covariance, show_noise, noise=self.noise_g)
-        filtered_signal = lowpass_filter(noise_signal, cutoff_frequency, self.sampling_frequency)
-
-        self.ax.plot(self.t, harmonic_signal, lw=2, color='black', linestyle=':', label='Harmonic Signal')
-        self.ax.plot(self.t, noise_signal, lw=2, color='red', label='Noise Signal')
-        self.ax.plot(self.t, filtered_signal, lw=2, color='#0f16e6', label='Filtered Signal')
-
+    def init_plot(self):
+        # Лінії створюються один раз і далі лише отримують нові дані через set_ydata
+        zeros = np.zeros_like(self.t)
+        self.harmonic_line, = self.ax.plot(self.t, zeros, lw=2, color='black', linestyle=':', label='Harmonic Signal', animated=True)
+        self.noise_line, = self.ax.plot(self.t, zeros, lw=2, color='red', label='Noise Signal', animated=True)
+        self.filtered_line, = self.ax.plot(self.t, zeros, lw=2, color='#0f16e6', label='Filtered Signal', animated=True)
+        self.lines = (self.harmonic_line, self.noise_line, self.filtered_line)
+
+        self.ax.set_xlim(self.t[0], self.t[-1])
+        self.ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+        self.ax.callbacks.connect('ylim_changed', self.on_ylim_changed)
         self.ax.set_title("Signal Analysis", fontsize=16)
         self.ax.set_xlabel("Time", fontsize=14)
         self.ax.set_ylabel("Amplitude", fontsize=14)
         self.ax.legend()
         self.ax.grid(True)
 
-        self.canvas.draw()
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    # Після повного перемальовування запам'ятовується фон без ліній для blitting
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.draw_lines()
+
+    # Масштабування чи зсув осі X: огинаюча перераховується для нової ділянки,
+    # а фон з новими осями потребує повного перемальовування
+    def on_xlim_changed(self, ax):
+        if self.decimate:
+            self.background = None
+            self.schedule_redraw('view')
+
+    # Межі Y, задані панеллю інструментів, не перераховуються автоматично до Reset
+    def on_ylim_changed(self, ax):
+        if not self.setting_limits:
+            self.autoscale_y = False
+
+    # Піраміда будується лише для нових даних лінії; та сама послідовність
+    # (шумовий сигнал без шуму дорівнює гармонічному) використовує вже побудовану
+    def set_signal(self, line, values):
+        if self.decimate:
+            pyramid = next((p for p in self.pyramids.values() if p.y is values), None)
+            self.pyramids[line] = pyramid or SignalPyramid(values)
+        else:
+            line.set_ydata(values)
+
+    def update_view(self):
+        start, stop = index_range(self.t, *self.ax.get_xlim())
+        width = max(int(self.ax.bbox.width), 1)
+        index = union_indices(self.pyramids.values(), start, stop, width)
+        for line, pyramid in self.pyramids.items():
+            line.set_data(self.t[index], pyramid.y[index])
+
+    def draw_lines(self):
+        for line in self.lines:
+            self.ax.draw_artist(line)
+
+    # Позначає етап та всі залежні від нього етапи як застарілі
+    def invalidate(self, name):
+        self.dirty.add(name)
+        for dependent in STAGE_DEPENDENTS[name]:
+            self.invalidate(dependent)
+
+    # Події повзунків об'єднуються: не більше одного перемальовування за кадр;
+    # у потоковому режимі значення повзунків читає stream_tick
+    def schedule_redraw(self, *stages):
+        for name in stages:
+            self.invalidate(name)
+        if self.stream_state['after'] is not None:
+            return
+        if self.pending_redraw is None:
+            self.pending_redraw = self.root.after(FRAME_INTERVAL_MS, self.plot_signals)
+
+    @timed('lab_5.plot_signals')
+    def plot_signals(self):
+        self.pending_redraw = None
+
+        with stage('lab_5.compute'):
+            if 'noise' in self.dirty:
+                self.noise_g = create_noise(self.t, self.noise_mean_var.get(), self.noise_covariance_var.get())
+            if 'harmonic' in self.dirty:
+                self.harmonic_signal = harmonic(self.t, self.amplitude_var.get(), self.frequency_var.get(), self.phase_var.get())
+                self.set_signal(self.harmonic_line, self.harmonic_signal)
+            if 'noise_signal' in self.dirty:
+                if self.show_noise_var.get():
+                    self.noise_signal = self.harmonic_signal + self.noise_g
+                else:
+                    self.noise_signal = self.harmonic_signal
+                self.set_signal(self.noise_line, self.noise_signal)
+        if 'filtered' in self.dirty:
+            with stage('lab_5.filter'):
+                self.filtered_signal = lowpass_filter(self.noise_signal, self.cutoff_frequency_var.get(), self.sampling_frequency)
+                self.set_signal(self.filtered_line, self.filtered_signal)
+        if 'view' in self.dirty and self.decimate:
+            with stage('lab_5.view'):
+                self.update_view()
+        self.dirty.clear()
+        self.render()
+
+    def render(self):
+        with stage('lab_5.render'):
+            if self.update_limits() or self.background is None:
+                self.canvas.draw()
+            else:
+                self.canvas.restore_region(self.background)
+                self.draw_lines()
+                self.canvas.blit(self.ax.bbox)
+
+    # Межі осі Y змінюються лише коли дані виходять за них або займають менше половини,
+    # інакше фон з осями лишається дійсним і достатньо blitting
+    def update_limits(self):
+        if not self.autoscale_y:
+            return False
+        low = min(line.get_ydata().min() for line in self.lines)
+        high = max(line.get_ydata().max() for line in self.lines)
+        bottom, top = self.ax.get_ylim()
+        span = max(high - low, 1e-9)
+        if low >= bottom and high <= top and span >= 0.5 * (top - bottom):
+            return False
+        margin = 0.05 * span
+        self.setting_limits = True
+        try:
+            self.ax.set_ylim(low - margin, high + margin)
+        finally:
+            self.setting_limits = False
+        return True
+
+    # Нова порція сигналу з неперервною віссю часу зсуває вікно ліній ліворуч;
+    # фільтр отримує лише нові відліки, частота зрізу змінюється без перезапуску
+    def stream_tick(self):
+        state = self.stream_state
+        block = max(1, int(round(self.sampling_frequency * STREAM_PERIOD_MS / 1000)))
+        t_block = (state['sample'] + np.arange(block)) / self.sampling_frequency
+        harmonic_block = harmonic(t_block, self.amplitude_var.get(), self.frequency_var.get(), self.phase_var.get())
+        noisy_block = harmonic_block
+        if self.show_noise_var.get():
+            noisy_block = harmonic_block + create_noise(t_block, self.noise_mean_var.get(), self.noise_covariance_var.get())
+
+        lowpass = state['lowpass']
+        if lowpass.cutoff_freq != self.cutoff_frequency_var.get():
+            lowpass.set_cutoff(self.cutoff_frequency_var.get())
+        with stage('lab_5.filter'):
+            filtered_block = lowpass.process(noisy_block)
+
+        with stage('lab_5.compute'):
+            self.harmonic_signal = shift_in(self.harmonic_signal, harmonic_block)
+            self.noise_signal = shift_in(self.noise_signal, noisy_block)
+            self.filtered_signal = shift_in(self.filtered_signal, filtered_block)
+            for line, values in zip(self.lines, (self.harmonic_signal, self.noise_signal, self.filtered_signal)):
+                self.set_signal(line, values)
+        if self.decimate:
+            with stage('lab_5.view'):
+                self.update_view()
+        self.render()
+
+        state['sample'] += block
+        state['after'] = self.root.after(STREAM_PERIOD_MS, self.stream_tick)
+
+    def toggle_streaming(self):
+        state = self.stream_state
+        if self.streaming_var.get():
+            if state['after'] is None:
+                if self.pending_redraw is not None:
+                    self.root.after_cancel(self.pending_redraw)
+                    self.pending_redraw = None
+                # Потік продовжує поточне вікно: відліки нумеруються від його кінця
+                state['sample'] = len(self.t)
+                state['lowpass'] = StreamingLowpass(self.cutoff_frequency_var.get(), self.sampling_frequency)
+                state['lowpass'].process(self.noise_signal)
+                state['after'] = self.root.after(STREAM_PERIOD_MS, self.stream_tick)
+        elif state['after'] is not None:
+            self.root.after_cancel(state['after'])
+            state['after'] = None
+            state['lowpass'] = None
+            self.schedule_redraw('noise', 'harmonic')
 
     def update(self, val=None):
-        self.plot_signals()
+        self.schedule_redraw('harmonic')
+
+    def update_show_noise(self):
+        self.schedule_redraw('noise_signal')
 
     def update_noise(self, val=None):
-        self.noise_g = create_noise(self.t, self.noise_mean_var.get(), self.noise_covariance_var.get())
-        self.plot_signals()
+        self.schedule_redraw('noise')
 
     def update_filter(self, val=None):
-        self.plot_signals()
+        self.schedule_redraw('filtered')
 
+    # Гармонічний сигнал від шуму не залежить, тому лишається разом зі своєю пірамідою
     def regenerate_noise(self):
-        self.noise_g = create_noise(self.t, self.noise_mean_var.get(), self.noise_covariance_var.get())
-        self.plot_signals()
+        self.schedule_redraw('noise')
 
     def random_params(self):
         self.amplitude_var.set(np.random.uniform(0.1, 10.0))
@@ -141,7 +324,7 @@ class SignalApp:
         self.phase_var.set(np.random.uniform(0.0, 2 * np.pi))
         self.noise_mean_var.set(np.random.uniform(-1.0, 1.0))
         self.noise_covariance_var.set(np.random.uniform(0.0, 1.0))
-        self.regenerate_noise()
+        self.schedule_redraw('noise', 'harmonic')
 
     def reset(self):
         self.amplitude_var.set(1.0)
@@ -151,10 +334,14 @@ class SignalApp:
         self.noise_covariance_var.set(0.1)
         self.cutoff_frequency_var.set(3.0)
         self.show_noise_var.set(True)
-        self.regenerate_noise()
+        self.autoscale_y = True
+        self.background = None
+        self.ax.set_xlim(self.t[0], self.t[-1])
+        self.schedule_redraw('noise', 'harmonic')
 
 
 if __name__ == "__main__":
     root = tk.Tk()
-    app = SignalApp(root)
+    # Необов'язковий аргумент: кількість відліків сигналу, наприклад python lab_5.py 10000000
+    app = SignalApp(root, samples=int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
     root.mainloop()
@@ -1,9 +1,18 @@
 from bokeh.plotting import figure, curdoc
 from bokeh.layouts import column, row
-from bokeh.models import Slider, CheckboxGroup, Button, TextInput, Div, Toggle
+from bokeh.models import Slider, CheckboxGroup, Button, TextInput, Div, Toggle, ColumnDataSource, DataRange1d, Range1d
 from bokeh.themes import Theme
+from bokeh.core.property.descriptors import UnsetValueError
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from jinja2 import Template
 import numpy as np
+import os
 import random
+import time
+from decimation import SignalPyramid, index_range, union_indices
+from instrumentation import observe_latency, observe_size, register_cache, stage, timed
+from signal_filters import RunningMean, moving_average, moving_average_table
 
 def harmonic(t, amplitude, frequency, phase):
     return amplitude * np.sin(2 * np.pi * frequency * t + phase)
@@ -11,158 +20,158 @@ def harmonic(t, amplitude, frequency, phase):
 def create_noise(t, noise_mean, noise_std):
     return np.random.normal(noise_mean, noise_std, len(t))
 
-def harmonic_with_noise(t, amplitude, frequency, phase=0, noise_mean=0, noise_std=0.1, noise=None):
-    harmonic_signal = harmonic(t, amplitude, frequency, phase)
-    if noise is not None:
-        return harmonic_signal + noise
-    else:
-        global noise_g
-        noise_g = create_noise(t, noise_mean, noise_std)
-        return harmonic_signal + noise_g
-
-def moving_avg(data, window_size):
-    return np.convolve(data, np.ones(window_size)/window_size, mode='same')
-
 # Initial parameters
 initial_amplitude = 1.0
 initial_frequency = 1.0
 initial_phase = 0.0
 initial_noise_mean = 0.0
 initial_noise_std = 0.1
+initial_window_size = 5
+initial_title = 'Harmonic Signal with Noise and Moving Average Filter'
+
+INITIAL_PARAMS = dict(amplitude=initial_amplitude, frequency=initial_frequency, phase=initial_phase,
+                      noise_mean=initial_noise_mean, noise_std=initial_noise_std,
+                      window_size=initial_window_size)
+
+# Everything below up to SignalSession is built once per server process and shared by all
+# sessions, so it must never be modified in place
+N_SAMPLES = int(os.environ.get('SIGNAL_SAMPLES', 1000))  # e.g. SIGNAL_SAMPLES=10000000 bokeh serve ...
+t = np.linspace(0, 10, N_SAMPLES)
+t.setflags(write=False)
+WINDOW_SIZES = np.arange(1, 51)  # rows of the precomputed moving average table
+TABLE_MAX_SAMPLES = 100000  # longer signals compute the selected window only
+UPDATE_DEBOUNCE_MS = 30
+# Cached standard normal realizations that Regenerate Noise picks from, fewer for long signals
+NOISE_POOL_BYTES = 64 * 2 ** 20
+NOISE_POOL_SIZE = int(np.clip(NOISE_POOL_BYTES // (8 * N_SAMPLES), 2, 32))
+WORKERS = 4
+
+# Longer signals are sent as a min/max envelope of the visible x range, at most two points
+# per pixel column and series, recomputed from each series' pyramid when the range changes
+DECIMATE = N_SAMPLES > 10000
+PLOT_WIDTH = 1200
+
+# Streaming mode: new samples are pushed in blocks, only the deltas go over the websocket
+STREAM_SAMPLE_RATE = 20000  # samples per second
+STREAM_PERIOD_MS = 50
+STREAM_BLOCK = STREAM_SAMPLE_RATE * STREAM_PERIOD_MS // 1000
+STREAM_ROLLOVER = STREAM_SAMPLE_RATE  # one second of samples stays in the browser
+
+LIGHT_THEME = Theme(json={'attrs': {'Figure': {'background_fill_color': '#ffffff',
+                                               'border_fill_color': '#ffffff',
+                                               'outline_line_color': '#000000'},
+                                    'Axis': {'major_label_text_color': '#000000',
+                                             'axis_label_text_color': '#000000',
+                                             'major_tick_line_color': '#000000',
+                                             'minor_tick_line_color': '#000000',
+                                             'axis_line_color': '#000000'},
+                                    'Title': {'text_color': '#000000'},
+                                    'Legend': {'background_fill_color': '#ffffff',
+                                               'border_line_color': '#000000',
+                                               'label_text_color': '#000000'}}})
+
+DARK_THEME = Theme(json={'attrs': {'Figure': {'background_fill_color': '#2e2e2e',
+                                              'border_fill_color': '#2e2e2e',
+                                              'outline_line_color': '#ffffff'},
+                                   'Axis': {'major_label_text_color': '#ffffff',
+                                            'axis_label_text_color': '#ffffff',
+                                            'major_tick_line_color': '#ffffff',
+                                            'minor_tick_line_color': '#ffffff',
+                                            'axis_line_color': '#ffffff'},
+                                   'Title': {'text_color': '#ffffff'},
+                                   'Legend': {'background_fill_color': '#2e2e2e',
+                                              'border_line_color': None,
+                                              'label_text_color': '#ffffff'}}})
+
+# Each computation stage lists the stages derived from it; widgets only invalidate what they feed
+STAGE_DEPENDENTS = {
+    'unit_noise': ('noisy',),
+    'harmonic': ('noisy',),
+    'noisy': ('table',),
+    'table': ('filtered',),
+    'filtered': ('view',),
+    'view': (),
+}
+
+_shared = {'noise_pool': None, 'executor': None}
+
+def noise_pool():
+    if _shared['noise_pool'] is None:
+        pool = np.random.standard_normal((NOISE_POOL_SIZE, len(t)))
+        pool.setflags(write=False)
+        _shared['noise_pool'] = pool
+    return _shared['noise_pool']
+
+# Recomputation runs on worker threads so the Tornado loop keeps serving other sessions;
+# NumPy releases the GIL for the array work
+def executor():
+    if _shared['executor'] is None:
+        _shared['executor'] = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='signal')
+    return _shared['executor']
+
+# Pure function of the parameters and the previous series, safe to call from a worker thread
+@timed('lab_5_bokeh.compute')
+def compute_series(params, previous, stages):
+    series = dict(previous)
+    changed = {}
+    if 'harmonic' in stages:
+        series['harmonic'] = changed['harmonic'] = harmonic(t, params['amplitude'], params['frequency'],
+                                                            params['phase'])
+    if 'noisy' in stages:
+        noise = params['noise_mean'] + params['noise_std'] * noise_pool()[params['noise_index']]
+        series['noisy'] = changed['noisy'] = series['harmonic'] + noise
+    if 'table' in stages:
+        series['table'] = moving_average_table(series['noisy'], WINDOW_SIZES) if len(t) <= TABLE_MAX_SAMPLES else None
+    if 'filtered' in stages:
+        if series['table'] is not None:
+            filtered = series['table'][int(params['window_size']) - WINDOW_SIZES[0]]
+        else:
+            filtered = moving_average(series['noisy'], int(params['window_size']))
+        series['filtered'] = changed['filtered'] = filtered
+    if DECIMATE:
+        series['pyramids'] = dict(series.get('pyramids', {}))
+        for name, values in changed.items():
+            series['pyramids'][name] = SignalPyramid(values)
+        if changed or 'view' in stages:
+            # The visible points change with any series, so every column is sent
+            changed = decimated_view(series['pyramids'], params['x_range'], params['width'])
+    return series, changed
+
+def decimated_view(pyramids, x_range, width):
+    start, stop = index_range(t, *x_range)
+    index = union_indices(pyramids.values(), start, stop, width)
+    return dict(t=t[index], **{name: pyramid.y[index] for name, pyramid in pyramids.items()})
 
-t = np.linspace(0, 10, 1000)
-
-plot = figure(title="Harmonic Signal with Noise and Moving Average Filter",
-              x_axis_label='Time', y_axis_label='Amplitude',
-              width=1200, height=600, background_fill_color='#2e2e2e', border_fill_color='#2e2e2e')
-
-harmonic_line = plot.line(t, harmonic(t, initial_amplitude, initial_frequency, initial_phase),
-                          line_width=2, color='blue', legend_label='Harmonic line')
-
-with_noise_line = plot.line(t, harmonic_with_noise(t, initial_amplitude, initial_frequency, initial_phase,
-                                                   initial_noise_mean, initial_noise_std),
-                            line_width=2, color='red', legend_label='Signal with noise')
-
-filtered_signal = moving_avg(with_noise_line.data_source.data['y'], 5)
-filtered_line = plot.line(t, filtered_signal, line_width=2, color='green', legend_label='Filtered Signal')
-
-plot.legend.label_text_color = "white"
-plot.legend.background_fill_color = "#2e2e2e"
-plot.legend.border_line_color = None
-plot.xaxis.axis_label_text_color = "white"
-plot.yaxis.axis_label_text_color = "white"
-plot.xaxis.major_label_text_color = "white"
-plot.yaxis.major_label_text_color = "white"
-plot.title.text_color = "white"
-
-# Widgets
-s_amplitude = Slider(title="Amplitude", value=initial_amplitude, start=0.1, end=10.0, step=0.1, bar_color='blue')
-s_frequency = Slider(title="Frequency", value=initial_frequency, start=0.1, end=10.0, step=0.1, bar_color='blue')
-s_phase = Slider(title="Phase", value=initial_phase, start=0.0, end=2 * np.pi, step=0.1, bar_color='blue')
-s_noise_mean = Slider(title="Noise Mean", value=initial_noise_mean, start=-1.0, end=1.0, step=0.1, bar_color='red')
-s_noise_std = Slider(title="Noise Std Dev", value=initial_noise_std, start=0.0, end=1.0, step=0.1, bar_color='red')
-s_window_size = Slider(title="Moving Average Window Size", value=5, start=1, end=50, step=1, bar_color='green')
-
-cb_show_noise = CheckboxGroup(labels=['Show Noise'], active=[0], css_classes=['custom-checkbox'])
-button_regenerate_noise = Button(label='Regenerate Noise', button_type='success', css_classes=['custom-button'])
-button_random_params = Button(label='Random Params', button_type='warning', css_classes=['custom-button'])
-button_reset = Button(label='Reset', button_type='danger', css_classes=['custom-button'])
-input_title = TextInput(value='Harmonic Signal with Noise and Moving Average Filter', title='Plot Title:', css_classes=['custom-input'])
-title_div = Div(text=f"<h2 style='color:white;'>{input_title.value}</h2>")
-
-toggle_theme = Toggle(label="Toggle Light/Dark Theme", button_type="default", css_classes=['custom-toggle'])
-
-def update(attr, old, new):
-    amplitude = s_amplitude.value
-    frequency = s_frequency.value
-    phase = s_phase.value
-    noise_mean = s_noise_mean.value
-    noise_std = s_noise_std.value
-    window_size = s_window_size.value
-
-    harmonic_line.data_source.data['y'] = harmonic(t, amplitude, frequency, phase)
-    with_noise_line.data_source.data['y'] = harmonic_with_noise(t, amplitude, frequency, phase, noise_mean, noise_std)
-    filtered_signal = moving_avg(with_noise_line.data_source.data['y'], window_size)
-    filtered_line.data_source.data['y'] = filtered_signal
-
-    plot.title.text = input_title.value
-    title_div.text = f"<h2 style='color:white;'>{input_title.value}</h2>"
-
-def regenerate_noise():
-    noise_mean = s_noise_mean.value
-    noise_std = s_noise_std.value
-    noise_g = create_noise(t, noise_mean, noise_std)
-    update(None, None, None)
-
-def random_params():
-    s_amplitude.value = random.uniform(0.1, 10.0)
-    s_frequency.value = random.uniform(0.1, 10.0)
-    s_phase.value = random.uniform(0.0, 2 * np.pi)
-    s_noise_mean.value = random.uniform(-1.0, 1.0)
-    s_noise_std.value = random.uniform(0.0, 1.0)
-    regenerate_noise()
-
-def reset_params():
-    s_amplitude.value = initial_amplitude
-    s_frequency.value = initial_frequency
-    s_phase.value = initial_phase
-    s_noise_mean.value = initial_noise_mean
-    s_noise_std.value = initial_noise_std
-    s_window_size.value = 5
-    input_title.value = 'Harmonic Signal with Noise and Moving Average Filter'
-    regenerate_noise()
-
-def toggle_light_dark_theme(active):
-    if active:
-        curdoc().theme = Theme(json={'attrs': {'Figure': {'background_fill_color': '#ffffff',
-                                                          'border_fill_color': '#ffffff',
-                                                          'outline_line_color': '#000000'},
-                                               'Axis': {'major_label_text_color': '#000000',
-                                                        'axis_label_text_color': '#000000',
-                                                        'major_tick_line_color': '#000000',
-                                                        'minor_tick_line_color': '#000000',
-                                                        'axis_line_color': '#000000'},
-                                               'Title': {'text_color': '#000000'},
-                                               'Legend': {'background_fill_color': '#ffffff',
-                                                          'border_line_color': '#000000',
-                                                          'label_text_color': '#000000'}}})
-    else:
-        curdoc().theme = Theme(json={'attrs': {'Figure': {'background_fill_color': '#2e2e2e',
-                                                          'border_fill_color': '#2e2e2e',
-                                                          'outline_line_color': '#ffffff'},
-                                               'Axis': {'major_label_text_color': '#ffffff',
-                                                        'axis_label_text_color': '#ffffff',
-                                                        'major_tick_line_color': '#ffffff',
-                                                        'minor_tick_line_color': '#ffffff',
-                                                        'axis_line_color': '#ffffff'},
-                                               'Title': {'text_color': '#ffffff'},
-                                               'Legend': {'background_fill_color': '#2e2e2e',
-                                                          'border_line_color': None,
-                                                          'label_text_color': '#ffffff'}}})
-
-s_amplitude.on_change('value', update)
-s_frequency.on_change('value', update)
-s_phase.on_change('value', update)
-s_noise_mean.on_change('value', update)
-s_noise_std.on_change('value', update)
-s_window_size.on_change('value', update)
-input_title.on_change('value', update)
-
-button_regenerate_noise.on_click(regenerate_noise)
-button_random_params.on_click(random_params)
-button_reset.on_click(reset_params)
-toggle_theme.on_click(toggle_light_dark_theme)
-
-layout = column(title_div, plot,
-                column(s_amplitude, s_frequency, s_phase, s_noise_mean, s_noise_std, s_window_size, css_classes=['custom-widgetbox']),
-                row(cb_show_noise, button_regenerate_noise, button_random_params, button_reset, toggle_theme, css_classes=['custom-row']),
-                input_title,
-                sizing_mode='stretch_width')
-
-curdoc().add_root(layout)
-curdoc().title = "Signal Processing Interactive Tool"
-
-curdoc().template = """
+def display_data(series):
+    if DECIMATE:
+        return decimated_view(series['pyramids'], (t[0], t[-1]), PLOT_WIDTH)
+    return dict(t=t, harmonic=series['harmonic'], noisy=series['noisy'], filtered=series['filtered'])
+
+# Series for the initial parameters, shared by every session that starts on the same realization
+@lru_cache(maxsize=NOISE_POOL_SIZE)
+def initial_series(noise_index):
+    params = dict(INITIAL_PARAMS, noise_index=noise_index, x_range=(t[0], t[-1]), width=PLOT_WIDTH)
+    series, _ = compute_series(params, {}, set(STAGE_DEPENDENTS))
+    for name in ('harmonic', 'noisy', 'table', 'filtered'):
+        if series[name] is not None:
+            series[name].setflags(write=False)
+    return series
+
+register_cache('lab_5_bokeh.initial_series', initial_series)
+
+# server_lifecycle hooks of the signal_server directory app
+def warm_up(server_context=None):
+    noise_pool()
+    executor()
+    for noise_index in range(NOISE_POOL_SIZE):
+        initial_series(noise_index)
+
+def shutdown(server_context=None):
+    if _shared['executor'] is not None:
+        _shared['executor'].shutdown(wait=False)
+        _shared['executor'] = None
+
+TEMPLATE = Template("""
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -218,4 +227,235 @@ curdoc().template = """
     {{ plot_script|indent(8) }}
 </body>
 </html>
-"""
+""")
+
+
+# All state of one browser session: its document, models and pending recomputation
+class SignalSession:
+    def __init__(self, doc):
+        self.doc = doc
+        self.closed = False
+        self.pending = set()
+        self.timeout = None
+        self.busy = False
+        # Time of the first slider event not yet shown, for the end-to-end update latency
+        self.requested_at = None
+        self.stream_state = {'callback': None, 'sample': 0, 'mean': None}
+        self.noise_index = random.randrange(NOISE_POOL_SIZE)
+        self.series = initial_series(self.noise_index)
+
+        self.init_plot()
+        self.init_widgets()
+        self.connect()
+
+        doc.add_root(self.layout())
+        doc.title = "Signal Processing Interactive Tool"
+        doc.template = TEMPLATE
+        doc.on_session_destroyed(self.on_session_destroyed)
+
+    def init_plot(self):
+        # A fixed range reports zoom and pan back to the server, which re-decimates the view
+        self.view_range = Range1d(t[0], t[-1], bounds='auto') if DECIMATE else DataRange1d()
+        self.plot = figure(title=initial_title,
+                           x_axis_label='Time', y_axis_label='Amplitude', x_range=self.view_range,
+                           width=PLOT_WIDTH, height=600, background_fill_color='#2e2e2e', border_fill_color='#2e2e2e')
+
+        self.source = ColumnDataSource(data=display_data(self.series), name='signal_source')
+
+        self.plot.line('t', 'harmonic', source=self.source, line_width=2, color='blue', legend_label='Harmonic line')
+        self.plot.line('t', 'noisy', source=self.source, line_width=2, color='red', legend_label='Signal with noise')
+        self.plot.line('t', 'filtered', source=self.source, line_width=2, color='green', legend_label='Filtered Signal')
+
+        self.plot.legend.label_text_color = "white"
+        self.plot.legend.background_fill_color = "#2e2e2e"
+        self.plot.legend.border_line_color = None
+        self.plot.xaxis.axis_label_text_color = "white"
+        self.plot.yaxis.axis_label_text_color = "white"
+        self.plot.xaxis.major_label_text_color = "white"
+        self.plot.yaxis.major_label_text_color = "white"
+        self.plot.title.text_color = "white"
+
+    def init_widgets(self):
+        self.s_amplitude = Slider(title="Amplitude", value=initial_amplitude, start=0.1, end=10.0, step=0.1, bar_color='blue', name='amplitude')
+        self.s_frequency = Slider(title="Frequency", value=initial_frequency, start=0.1, end=10.0, step=0.1, bar_color='blue', name='frequency')
+        self.s_phase = Slider(title="Phase", value=initial_phase, start=0.0, end=2 * np.pi, step=0.1, bar_color='blue', name='phase')
+        self.s_noise_mean = Slider(title="Noise Mean", value=initial_noise_mean, start=-1.0, end=1.0, step=0.1, bar_color='red', name='noise_mean')
+        self.s_noise_std = Slider(title="Noise Std Dev", value=initial_noise_std, start=0.0, end=1.0, step=0.1, bar_color='red', name='noise_std')
+        self.s_window_size = Slider(title="Moving Average Window Size", value=initial_window_size, start=WINDOW_SIZES[0], end=WINDOW_SIZES[-1], step=1, bar_color='green', name='window_size')
+
+        self.cb_show_noise = CheckboxGroup(labels=['Show Noise'], active=[0], css_classes=['custom-checkbox'])
+        self.button_regenerate_noise = Button(label='Regenerate Noise', button_type='success', css_classes=['custom-button'])
+        self.button_random_params = Button(label='Random Params', button_type='warning', css_classes=['custom-button'])
+        self.button_reset = Button(label='Reset', button_type='danger', css_classes=['custom-button'])
+        self.input_title = TextInput(value=initial_title, title='Plot Title:', css_classes=['custom-input'], name='title')
+        self.title_div = Div(text=f"<h2 style='color:white;'>{self.input_title.value}</h2>")
+
+        self.toggle_theme = Toggle(label="Toggle Light/Dark Theme", button_type="default", css_classes=['custom-toggle'])
+        self.toggle_stream = Toggle(label="Streaming Mode", button_type="default", css_classes=['custom-toggle'])
+
+    def connect(self):
+        self.s_amplitude.on_change('value', self.update('harmonic'))
+        self.s_frequency.on_change('value', self.update('harmonic'))
+        self.s_phase.on_change('value', self.update('harmonic'))
+        self.s_noise_mean.on_change('value', self.update('noisy'))
+        self.s_noise_std.on_change('value', self.update('noisy'))
+        self.s_window_size.on_change('value', self.update('filtered'))
+        self.input_title.on_change('value', self.update_title)
+        if DECIMATE:
+            self.view_range.on_change('start', self.update('view'))
+            self.view_range.on_change('end', self.update('view'))
+
+        self.button_regenerate_noise.on_click(self.regenerate_noise)
+        self.button_random_params.on_click(self.random_params)
+        self.button_reset.on_click(self.reset_params)
+        self.toggle_theme.on_click(self.toggle_light_dark_theme)
+        self.toggle_stream.on_click(self.toggle_streaming)
+
+    def layout(self):
+        return column(self.title_div, self.plot,
+                      column(self.s_amplitude, self.s_frequency, self.s_phase, self.s_noise_mean, self.s_noise_std, self.s_window_size, css_classes=['custom-widgetbox']),
+                      row(self.cb_show_noise, self.button_regenerate_noise, self.button_random_params, self.button_reset, self.toggle_theme, self.toggle_stream, css_classes=['custom-row']),
+                      self.input_title,
+                      sizing_mode='stretch_width')
+
+    def on_session_destroyed(self, session_context):
+        self.closed = True
+
+    def params(self):
+        params = dict(amplitude=self.s_amplitude.value, frequency=self.s_frequency.value, phase=self.s_phase.value,
+                      noise_mean=self.s_noise_mean.value, noise_std=self.s_noise_std.value,
+                      window_size=self.s_window_size.value, noise_index=self.noise_index)
+        if DECIMATE:
+            # inner_width is reported by the browser once the plot has been laid out
+            try:
+                width = self.plot.inner_width
+            except UnsetValueError:
+                width = None
+            params.update(x_range=(self.view_range.start, self.view_range.end), width=width or PLOT_WIDTH)
+        return params
+
+    def invalidate(self, name):
+        self.pending.add(name)
+        for dependent in STAGE_DEPENDENTS[name]:
+            self.invalidate(dependent)
+
+    # Rapid slider events within UPDATE_DEBOUNCE_MS are merged into a single recomputation
+    def schedule_update(self, *stages):
+        for name in stages:
+            self.invalidate(name)
+        if self.requested_at is None:
+            self.requested_at = time.perf_counter()
+        if self.timeout is None:
+            self.timeout = self.doc.add_timeout_callback(self.flush_updates, UPDATE_DEBOUNCE_MS)
+
+    # Widget values are read here on the loop thread, the arrays are computed on a worker;
+    # at most one computation per session is in flight, later changes wait for it
+    def flush_updates(self):
+        self.timeout = None
+
+        # While streaming, the periodic callback reads the widget values itself
+        if self.stream_state['callback'] is not None:
+            self.pending.clear()
+            self.requested_at = None
+            return
+        if self.busy or not self.pending:
+            return
+
+        stages, self.pending = self.pending, set()
+        self.busy = True
+        future = executor().submit(compute_series, self.params(), self.series, stages)
+        future.add_done_callback(self.on_computed)
+
+    # Called on the worker thread; add_next_tick_callback hands the result back to the loop
+    def on_computed(self, future):
+        if not self.closed:
+            self.doc.add_next_tick_callback(partial(self.apply_update, future))
+
+    def apply_update(self, future):
+        self.busy = False
+        self.series, changed = future.result()
+        if changed and self.stream_state['callback'] is None:
+            # One data update per tick, carrying only the columns that changed
+            with stage('lab_5_bokeh.apply'):
+                self.source.data.update(changed)
+            observe_size('lab_5_bokeh.payload', sum(np.asarray(values).nbytes for values in changed.values()))
+        if self.pending:
+            self.schedule_update()
+        elif self.requested_at is not None:
+            observe_latency('lab_5_bokeh.update', time.perf_counter() - self.requested_at)
+            self.requested_at = None
+
+    def update(self, *stages):
+        def callback(attr, old, new):
+            self.schedule_update(*stages)
+        return callback
+
+    def update_title(self, attr, old, new):
+        self.plot.title.text = self.input_title.value
+        self.title_div.text = f"<h2 style='color:white;'>{self.input_title.value}</h2>"
+
+    def static_data(self):
+        self.series, changed = compute_series(self.params(), self.series, set(STAGE_DEPENDENTS))
+        return changed if DECIMATE else display_data(self.series)
+
+    # Generates the next block of samples with a continuous time axis and streams it;
+    # the moving average carries its window over from the previous block
+    def stream_tick(self):
+        start = self.stream_state['sample']
+        t_block = (start + np.arange(STREAM_BLOCK)) / STREAM_SAMPLE_RATE
+        harmonic_block = harmonic(t_block, self.s_amplitude.value, self.s_frequency.value, self.s_phase.value)
+        noisy_block = harmonic_block + create_noise(t_block, self.s_noise_mean.value, self.s_noise_std.value)
+
+        running_mean = self.stream_state['mean']
+        if running_mean.window != self.s_window_size.value:
+            running_mean.set_window(self.s_window_size.value)
+
+        self.source.stream(dict(t=t_block, harmonic=harmonic_block, noisy=noisy_block,
+                                filtered=running_mean.process(noisy_block)), rollover=STREAM_ROLLOVER)
+        self.stream_state['sample'] = start + STREAM_BLOCK
+
+    def toggle_streaming(self, active):
+        if active:
+            self.stream_state['sample'] = 0
+            self.stream_state['mean'] = RunningMean(self.s_window_size.value)
+            self.source.data = dict(t=[], harmonic=[], noisy=[], filtered=[])
+            if DECIMATE:
+                # The streamed window follows its own data range
+                self.plot.x_range = DataRange1d()
+            self.stream_state['callback'] = self.doc.add_periodic_callback(self.stream_tick, STREAM_PERIOD_MS)
+        elif self.stream_state['callback'] is not None:
+            self.doc.remove_periodic_callback(self.stream_state['callback'])
+            self.stream_state['callback'] = None
+            self.plot.x_range = self.view_range
+            self.source.data = self.static_data()
+
+    def regenerate_noise(self):
+        self.noise_index = (self.noise_index + random.randrange(1, NOISE_POOL_SIZE)) % NOISE_POOL_SIZE
+        self.schedule_update('unit_noise')
+
+    def random_params(self):
+        self.s_amplitude.value = random.uniform(0.1, 10.0)
+        self.s_frequency.value = random.uniform(0.1, 10.0)
+        self.s_phase.value = random.uniform(0.0, 2 * np.pi)
+        self.s_noise_mean.value = random.uniform(-1.0, 1.0)
+        self.s_noise_std.value = random.uniform(0.0, 1.0)
+        self.regenerate_noise()
+
+    def reset_params(self):
+        self.s_amplitude.value = initial_amplitude
+        self.s_frequency.value = initial_frequency
+        self.s_phase.value = initial_phase
+        self.s_noise_mean.value = initial_noise_mean
+        self.s_noise_std.value = initial_noise_std
+        self.s_window_size.value = initial_window_size
+        self.input_title.value = initial_title
+        self.regenerate_noise()
+
+    def toggle_light_dark_theme(self, active):
+        self.doc.theme = LIGHT_THEME if active else DARK_THEME
+
+
+# `bokeh serve lab_5_bokeh.py` runs this file once per session under a bokeh_app_* module name;
+# signal_server/ imports it as a regular module instead, so the shared part is built only once
+if __name__.startswith('bokeh_app_'):
+    SignalSession(curdoc())
@@ -0,0 +1,126 @@
+# Benchmark of the optimizers against the gradient descent loop from lab_6.
+#
+# For every data size and configuration it reports the wall time of a fit, the number of
+# epochs, and the epochs needed to get within --target of the closed-form least squares loss.
+#
+# Example:
+#   python optimizer_bench.py --rows 1e4 1e5 1e6 1e7 --output bench_optimizers.json
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from bench_utils import measure
+from optimizers import fit
+from regression import fit_from_statistics, gradient_descent_trajectory, loss_and_gradient, sufficient_statistics
+
+K_TRUE = 7
+B_TRUE = 0
+NOISE_STD = 4
+
+# Stochastic methods get an epoch cap: with a constant learning rate they may hover in
+# their noise floor without meeting the stopping rule
+CONFIGS = {
+    'full-plain': dict(method='full', rule='plain', learning_rate=0.1),
+    'full-momentum': dict(method='full', rule='momentum', learning_rate=0.1),
+    'full-adam': dict(method='full', rule='adam', learning_rate=0.05),
+    'minibatch-plain': dict(method='minibatch', rule='plain', learning_rate=0.1, max_epochs=50),
+    'minibatch-momentum': dict(method='minibatch', rule='momentum', learning_rate=0.01, max_epochs=50),
+    'minibatch-adam': dict(method='minibatch', rule='adam', learning_rate=0.001, max_epochs=50),
+    'sgd-plain': dict(method='sgd', rule='plain', learning_rate=0.001, max_epochs=5),
+}
+
+
+# gradient_descent from lab_6 with the initial values passed in instead of drawn inside
+def notebook_gradient_descent(x, y, learning_rate, n_iter, k_hat, b_hat):
+    n = len(x)
+    for _ in range(n_iter):
+        y_pred = k_hat * x + b_hat
+        gradient_k = (-2/n) * np.sum(x * (y - y_pred))
+        gradient_b = (-2/n) * np.sum(y - y_pred)
+
+        k_hat -= learning_rate * gradient_k
+        b_hat -= learning_rate * gradient_b
+    return k_hat, b_hat
+
+
+def make_data(rows, offset=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 10, rows) + offset
+    y = K_TRUE * x + B_TRUE + rng.normal(0, NOISE_STD, rows)
+    return x, y
+
+
+# First epoch whose loss is within target (relative) of the optimum, None if never reached
+def epochs_to_target(losses, optimum, target):
+    reached = np.flatnonzero(np.asarray(losses) <= optimum * (1 + target))
+    return int(reached[0]) + 1 if len(reached) else None
+
+
+def run(rows_list, configs=None, repeats=3, offset=0.0, target=1e-3, baseline_iter=100, baseline_rate=0.01,
+        sgd_max_rows=10000, seed=0, log=print):
+    configs = configs or ['baseline'] + list(CONFIGS)
+    results = []
+    for rows in rows_list:
+        x, y = make_data(rows, offset, seed)
+        statistics = sufficient_statistics(x, y)
+        k_opt, b_opt = fit_from_statistics(*statistics[:5])
+        optimum = loss_and_gradient(statistics, k_opt, b_opt)[0]
+
+        for name in configs:
+            if name == 'baseline':
+                k0, b0 = np.random.default_rng(seed).random(2)
+                timing = measure(lambda: notebook_gradient_descent(x, y, baseline_rate, baseline_iter, k0, b0),
+                                 repeats, warmup=0, track_memory=False)
+                # Same iterates as the loop, from the O(1)-per-step statistics form
+                k_hat, b_hat, losses = gradient_descent_trajectory(x, y, baseline_rate, baseline_iter, seed)
+                epochs, converged = baseline_iter, False
+            else:
+                params = CONFIGS[name]
+                if params['method'] == 'sgd' and rows > sgd_max_rows:
+                    continue
+                fitted = []
+                timing = measure(lambda: fitted.append(fit(x, y, seed=seed, **params)), repeats, warmup=0,
+                                 track_memory=False)
+                k_hat, b_hat, epochs, converged, losses = fitted[-1]
+
+            result = dict(timing, config=name, rows=rows, epochs=epochs, converged=converged,
+                          epochs_to_target=epochs_to_target(losses, optimum, target),
+                          loss_excess=float(losses[-1] / optimum - 1), k_error=float(abs(k_hat - k_opt)))
+            results.append(result)
+            log(f"{name:>18} {rows:>9} rows: median {result['median'] * 1e3:10.2f} ms, "
+                f"epochs {epochs:>5}, to target {result['epochs_to_target']}, "
+                f"loss excess {result['loss_excess']:.2e}")
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Optimizer benchmark for the lab_6 regression")
+    parser.add_argument('--rows', nargs='+', type=lambda value: int(float(value)),
+                        default=[10000, 100000, 1000000, 10000000])
+    parser.add_argument('--configs', nargs='+', choices=['baseline'] + sorted(CONFIGS), default=None)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--offset', type=float, default=0.0, help="shift of x, shows the effect of standardization")
+    parser.add_argument('--target', type=float, default=1e-3, help="relative loss excess counted as reached")
+    parser.add_argument('--baseline-iter', type=int, default=100)
+    parser.add_argument('--baseline-rate', type=float, default=0.01)
+    parser.add_argument('--sgd-max-rows', type=int, default=10000,
+                        help="per-sample SGD is a Python loop, larger sizes are skipped")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args.rows, args.configs, args.repeats, args.offset, args.target, args.baseline_iter,
+                  args.baseline_rate, args.sgd_max_rows, args.seed)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+from collections import namedtuple
+
+import numpy as np
+
+from regression import loss_and_gradient, sufficient_statistics
+
+# Gradient-based fitting of y = k * x + b with full-batch, mini-batch and stochastic updates.
+#
+# With standardize=True the fit runs on (x - mean_x) / std_x and (y - mean_y) / std_y, where one
+# learning rate suits any scale of the data, and k, b are mapped back at the end. The full loss
+# is tracked from the sufficient statistics in O(1) per epoch, so early stopping on the relative
+# loss improvement costs nothing extra; full-batch gradients come from the statistics as well.
+
+OptimizeResult = namedtuple('OptimizeResult', ['k', 'b', 'epochs', 'converged', 'losses'])
+
+# Samples per update for each method, None means the whole data set
+BATCH_SIZES = {'full': None, 'minibatch': 1024, 'sgd': 1}
+
+# Default relative tolerance of the stopping rule; with a constant learning rate the
+# stochastic methods settle into a noise floor instead of converging exactly
+TOLERANCES = {'full': 1e-8, 'minibatch': 1e-4, 'sgd': 1e-4}
+
+
+class Plain:
+    def __init__(self, learning_rate):
+        self.learning_rate = learning_rate
+
+    def step(self, gradient):
+        return -self.learning_rate * gradient
+
+
+class Momentum:
+    def __init__(self, learning_rate, beta=0.9):
+        self.learning_rate = learning_rate
+        self.beta = beta
+        self.velocity = 0.0
+
+    def step(self, gradient):
+        self.velocity = self.beta * self.velocity + gradient
+        return -self.learning_rate * self.velocity
+
+
+class Adam:
+    def __init__(self, learning_rate, beta1=0.9, beta2=0.999, eps=1e-8):
+        self.learning_rate = learning_rate
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.m = 0.0
+        self.v = 0.0
+        self.t = 0
+
+    def step(self, gradient):
+        self.t += 1
+        self.m = self.beta1 * self.m + (1 - self.beta1) * gradient
+        self.v = self.beta2 * self.v + (1 - self.beta2) * gradient * gradient
+        m_hat = self.m / (1 - self.beta1 ** self.t)
+        v_hat = self.v / (1 - self.beta2 ** self.t)
+        return -self.learning_rate * m_hat / (np.sqrt(v_hat) + self.eps)
+
+
+RULES = {'plain': Plain, 'momentum': Momentum, 'adam': Adam}
+
+
+# Mean and standard deviation used for scaling; constant data keeps a scale of 1
+def _scale(mean, centered_sum, n):
+    std = np.sqrt(centered_sum / n)
+    return mean, std if std > 0 else 1.0
+
+
+def _batch_gradient(x, y, k, b):
+    residual = y - (k * x + b)
+    n = len(x)
+    return np.array([(-2 / n) * np.dot(x, residual), (-2 / n) * residual.sum()])
+
+
+def fit(x, y, method='full', rule='plain', learning_rate=0.1, batch_size=None, max_epochs=1000, tol=None,
+        patience=3, standardize=True, seed=0, **rule_params):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    statistics = sufficient_statistics(x, y)
+    n, mean_x, mean_y, sxx, sxy, syy = statistics
+    if standardize:
+        mean_x, std_x = _scale(mean_x, sxx, n)
+        mean_y, std_y = _scale(mean_y, syy, n)
+        statistics = (n, 0.0, 0.0, sxx / std_x ** 2, sxy / (std_x * std_y), syy / std_y ** 2)
+    else:
+        mean_x, std_x, mean_y, std_y = 0.0, 1.0, 0.0, 1.0
+
+    batch_size = batch_size or BATCH_SIZES[method] or n
+    tol = TOLERANCES[method] if tol is None else tol
+    if batch_size < n:
+        # One shuffle up front; every epoch then visits the batches in a new random order
+        rng = np.random.default_rng(seed)
+        order = rng.permutation(n)
+        x_work = (x[order] - mean_x) / std_x
+        y_work = (y[order] - mean_y) / std_y
+        starts = np.arange(0, n, batch_size)
+
+    rng = np.random.default_rng(seed)
+    params = rng.random(2)
+    optimizer = RULES[rule](learning_rate, **rule_params)
+
+    losses = []
+    previous = loss_and_gradient(statistics, *params)[0]
+    converged = False
+    stalled = 0
+    epochs = 0
+    for epochs in range(1, max_epochs + 1):
+        if batch_size >= n:
+            gradient = np.array(loss_and_gradient(statistics, *params)[1:])
+            params = params + optimizer.step(gradient)
+        else:
+            for start in starts[rng.permutation(len(starts))]:
+                stop = start + batch_size
+                gradient = _batch_gradient(x_work[start:stop], y_work[start:stop], *params)
+                params = params + optimizer.step(gradient)
+
+        loss = loss_and_gradient(statistics, *params)[0]
+        losses.append(loss * std_y ** 2)
+        if not np.isfinite(loss):
+            break
+        # Stop once the loss moves by at most tol relative to the previous epoch for patience
+        # epochs in a row. Small rises count as well (momentum, Adam and mini-batches hover
+        # around the optimum), any larger rise or drop starts the count again
+        stalled = stalled + 1 if abs(previous - loss) <= tol * previous else 0
+        previous = loss
+        if stalled >= patience:
+            converged = True
+            break
+
+    k_scaled, b_scaled = params
+    k_hat = k_scaled * std_y / std_x
+    b_hat = mean_y + std_y * b_scaled - k_hat * mean_x
+    return OptimizeResult(k_hat, b_hat, epochs, converged, np.array(losses))
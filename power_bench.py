@@ -0,0 +1,181 @@
+# Відтворюваний бенчмарк фільтрів lab_4 для DataFrame, типізованого NumPy та інших рушіїв.
+#
+# Приклад:
+#   python power_bench.py --rows 1e5 1e6 --repeats 7 --output bench_power.json
+#   python power_bench.py --rows 1e6 --compare bench_power.json
+#   python power_bench.py --rows 1e6 1e7 --tasks summary window build
+import argparse
+import json
+import platform
+import sys
+import time
+from collections import namedtuple
+from datetime import time as dt_time
+
+import numpy as np
+import pandas as pd
+
+import power_filters
+from bench_utils import measure
+from power_data import POWER_DTYPE, MEASUREMENTS, SECONDS_PER_DAY
+from power_rollup import ROLLUP_COLUMNS, PowerRollup, scan_statistics
+
+SAMPLE_SIZE = 500000
+START_TIMESTAMP = 1166289840  # 16/12/2006 17:24:00, перший рядок оригінального файлу
+
+Engine = namedtuple('Engine', ['prepare', 'tasks'])
+
+
+# Синтетичні хвилинні дані з розподілами, близькими до household_power_consumption
+def make_synthetic_records(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    records = np.empty(rows, dtype=POWER_DTYPE)
+    records['timestamp'] = START_TIMESTAMP + 60 * np.arange(rows, dtype=np.int64)
+    records['seconds'] = records['timestamp'] % SECONDS_PER_DAY
+    records['Global_active_power'] = rng.gamma(1.2, 1.0, rows)
+    records['Global_reactive_power'] = rng.uniform(0.0, 0.5, rows)
+    records['Voltage'] = rng.normal(240.0, 3.0, rows)
+    records['Global_intensity'] = rng.gamma(2.0, 3.0, rows)
+    records['Sub_metering_1'] = rng.integers(0, 40, rows)
+    records['Sub_metering_2'] = rng.integers(0, 40, rows)
+    records['Sub_metering_3'] = rng.integers(0, 20, rows)
+    return records
+
+
+# DataFrame у тому ж вигляді, що повертає create_data_frame з lab_4
+def records_to_frame(records):
+    timestamps = records['timestamp'].astype('datetime64[s]')
+    minutes = records['seconds'] // 60
+    times = np.array([dt_time(m // 60, m % 60) for m in range(24 * 60)], dtype=object)
+    df = pd.DataFrame({'Date': timestamps.astype('datetime64[D]').astype('datetime64[ns]'),
+                       'Time': times[minutes]})
+    for name in MEASUREMENTS:
+        df[name] = records[name].astype(np.float64)
+    return df
+
+
+# Вікно з середини даних з межами не на початку години, щоб запит зачіпав сирі рядки
+def window_bounds(records):
+    timestamps = records['timestamp']
+    return int(timestamps[len(timestamps) // 4]) + 1337, int(timestamps[3 * len(timestamps) // 4]) + 2821
+
+
+def _seeded_sample(fn):
+    def task(data):
+        np.random.seed(0)
+        return fn(data, n=SAMPLE_SIZE)
+    return task
+
+
+ENGINES = {
+    'pandas': Engine(records_to_frame, {
+        'power': power_filters.filter_by_power,
+        'voltage': power_filters.filter_by_voltage,
+        'current': power_filters.filter_by_current_and_consumption,
+        'random_sample': _seeded_sample(power_filters.random_sample_average),
+        'complex': power_filters.complex_filter,
+        'summary': lambda df: df[ROLLUP_COLUMNS].describe(),
+    }),
+    'numpy': Engine(lambda records: records, {
+        'power': power_filters.filter_by_power_np,
+        'voltage': power_filters.filter_by_voltage_np,
+        'current': power_filters.filter_by_current_and_consumption_np,
+        'random_sample': lambda records: power_filters.random_sample_average_np(
+            records, n=SAMPLE_SIZE, rng=np.random.default_rng(0)),
+        'complex': power_filters.complex_filter_np,
+        'summary': scan_statistics,
+        'window': lambda records: scan_statistics(records, *window_bounds(records)),
+    }),
+    # Агрегати будуються один раз у prepare, build вимірює саму побудову
+    'rollup': Engine(PowerRollup, {
+        'build': lambda rollup: PowerRollup(rollup.records),
+        'summary': lambda rollup: rollup.query(),
+        'window': lambda rollup: rollup.query(*window_bounds(rollup.records)),
+    }),
+}
+
+
+def run(rows_list, engines=None, tasks=None, repeats=7, warmup=2, seed=0, track_memory=True, log=print):
+    engines = engines or list(ENGINES)
+    results = []
+    for rows in rows_list:
+        records = make_synthetic_records(rows, seed)
+        for engine_name in engines:
+            engine = ENGINES[engine_name]
+            data = engine.prepare(records)
+            for task_name, fn in engine.tasks.items():
+                if tasks and task_name not in tasks:
+                    continue
+                result = measure(lambda: fn(data), repeats, warmup, track_memory)
+                result.update(engine=engine_name, task=task_name, rows=rows)
+                results.append(result)
+                log(f"{engine_name:>8} {task_name:>14} {rows:>11} rows: "
+                    f"median {result['median'] * 1e3:9.3f} ms, p90 {result['p90'] * 1e3:9.3f} ms")
+            del data
+    return results
+
+
+def metadata(args):
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'repeats': args.repeats,
+        'warmup': args.warmup,
+        'seed': args.seed,
+    }
+
+
+# Порівняння медіан з попереднім запуском, повертає список регресій
+def compare(baseline, results, tolerance=0.2):
+    previous = {(r['engine'], r['task'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get((result['engine'], result['task'], result['rows']))
+        if old is not None and result['median'] > old['median'] * (1 + tolerance):
+            regressions.append({'engine': result['engine'], 'task': result['task'], 'rows': result['rows'],
+                                'baseline_median': old['median'], 'median': result['median'],
+                                'ratio': result['median'] / old['median']})
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк фільтрів lab_4")
+    parser.add_argument('--rows', nargs='+', type=lambda value: int(float(value)), default=[100000, 1000000],
+                        help="розміри синтетичних наборів, наприклад 1e5 1e6 1e7")
+    parser.add_argument('--engines', nargs='+', choices=sorted(ENGINES), default=None)
+    parser.add_argument('--tasks', nargs='+', default=None)
+    parser.add_argument('--repeats', type=int, default=7)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help="не вимірювати пік пам'яті")
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--compare', default=None, help="JSON попереднього запуску для пошуку регресій")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args.rows, args.engines, args.tasks, args.repeats, args.warmup, args.seed,
+                  not args.no_memory)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'meta': metadata(args), 'results': results}, f, indent=1)
+        print(f"Результати збережено у {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        for r in regressions:
+            print(f"Регресія: {r['engine']} {r['task']} {r['rows']} rows: "
+                  f"{r['baseline_median'] * 1e3:.3f} ms -> {r['median'] * 1e3:.3f} ms (x{r['ratio']:.2f})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
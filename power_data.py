@@ -0,0 +1,87 @@
+# Потокове читання household_power_consumption.csv порціями.
+#
+# Кожна порція перетворюється на структурований масив POWER_DTYPE: timestamp (int64,
+# секунди від епохи), seconds (int32, секунди від півночі) та сім вимірювань у float32,
+# тобто 40 байт на рядок.
+# Бюджет пам'яті: пікове споживання RSS понад базове становить приблизно
+# chunk_size * 400 байт (текст порції та тимчасові рядки Date/Time у pandas),
+# для chunk_size=250_000 це близько 100 МБ незалежно від розміру файлу.
+import numpy as np
+import pandas as pd
+
+MEASUREMENTS = ['Global_active_power', 'Global_reactive_power', 'Voltage', 'Global_intensity',
+                'Sub_metering_1', 'Sub_metering_2', 'Sub_metering_3']
+
+POWER_DTYPE = np.dtype([('timestamp', np.int64), ('seconds', np.int32)] +
+                       [(name, np.float32) for name in MEASUREMENTS])
+
+SECONDS_PER_DAY = 86400
+
+DATE_FORMAT = '%d/%m/%Y'
+TIME_FORMAT = '%H:%M:%S'
+DEFAULT_CHUNK_SIZE = 250_000
+BYTES_PER_ROW_BUDGET = 400
+
+
+def peak_rss_budget(chunk_size=DEFAULT_CHUNK_SIZE):
+    return chunk_size * BYTES_PER_ROW_BUDGET
+
+
+# Дата та час парсяться з явним форматом лише для унікальних значень порції
+# (кілька днів та 1440 хвилин), а потім розгортаються за кодами factorize
+def parse_timestamps(dates, times):
+    date_codes, unique_dates = pd.factorize(dates)
+    time_codes, unique_times = pd.factorize(times)
+    days = pd.to_datetime(unique_dates, format=DATE_FORMAT).to_numpy(dtype='datetime64[s]').astype(np.int64)
+    seconds = pd.to_datetime(unique_times, format=TIME_FORMAT)
+    seconds = np.asarray(seconds.hour * 3600 + seconds.minute * 60 + seconds.second, dtype=np.int64)
+    return days[date_codes] + seconds[time_codes]
+
+
+# Перетворення порції pandas у структурований масив
+def chunk_to_records(chunk):
+    chunk = chunk.dropna()
+    records = np.empty(len(chunk), dtype=POWER_DTYPE)
+    records['timestamp'] = parse_timestamps(chunk['Date'], chunk['Time'])
+    records['seconds'] = records['timestamp'] % SECONDS_PER_DAY
+    for name in MEASUREMENTS:
+        records[name] = chunk[name].to_numpy()
+    return records
+
+
+def read_power_batches(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    dtype = {name: np.float32 for name in MEASUREMENTS}
+    dtype.update(Date=str, Time=str)
+    with pd.read_csv(file_path, dtype=dtype, na_values=['?'], chunksize=chunk_size) as reader:
+        for chunk in reader:
+            yield chunk_to_records(chunk)
+
+
+# Фільтрація без завантаження всього файлу, predicate повертає маску для порції
+def filter_batches(batches, predicate):
+    for batch in batches:
+        yield batch[predicate(batch)]
+
+
+# Кількість, суми та екстремуми кожної колонки за один прохід по порціях
+def column_totals(batches, columns=MEASUREMENTS):
+    count = 0
+    sums = dict.fromkeys(columns, 0.0)
+    minimums = dict.fromkeys(columns, np.inf)
+    maximums = dict.fromkeys(columns, -np.inf)
+    for batch in batches:
+        if not len(batch):
+            continue
+        count += len(batch)
+        for name in columns:
+            values = batch[name]
+            sums[name] += float(values.sum(dtype=np.float64))
+            minimums[name] = min(minimums[name], float(values.min()))
+            maximums[name] = max(maximums[name], float(values.max()))
+    means = {name: sums[name] / count if count else np.nan for name in columns}
+    return {'count': count, 'sum': sums, 'mean': means, 'min': minimums, 'max': maximums}
+
+
+def load_power_records(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    batches = list(read_power_batches(file_path, chunk_size))
+    return np.concatenate(batches) if batches else np.empty(0, dtype=POWER_DTYPE)
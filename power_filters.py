@@ -0,0 +1,84 @@
+# Фільтри lab_4 для DataFrame та для структурованого масиву POWER_DTYPE.
+# Варіанти *_np є векторними масками над числовими колонками, час доби
+# порівнюється як ціле число секунд від півночі.
+from datetime import time as dt_time
+
+import numpy as np
+import pandas as pd
+
+SUB_METERING = ['Sub_metering_1', 'Sub_metering_2', 'Sub_metering_3']
+
+
+def time_of_day(hours, minutes=0, seconds=0):
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def filter_by_power(df, threshold=5.0):
+    return df[df['Global_active_power'] > threshold]
+
+
+def filter_by_voltage(df, threshold=235):
+    return df[df['Voltage'] > threshold]
+
+
+def filter_by_current_and_consumption(df, current_range=(19, 20)):
+    filtered_df = df[(df['Global_intensity'] >= current_range[0]) & (df['Global_intensity'] <= current_range[1])]
+    filtered_df = filtered_df[(filtered_df['Sub_metering_2'] > filtered_df['Sub_metering_3']) &
+                              (filtered_df['Sub_metering_2'] > filtered_df['Sub_metering_1'])]
+    return filtered_df
+
+
+def random_sample_average(df, n=500000):
+    sampled_indices = np.random.choice(df.index, n, replace=True)
+    sampled_df = df.loc[sampled_indices]
+    averages = sampled_df[SUB_METERING].mean()
+    return averages
+
+
+def complex_filter(df):
+    filtered_df = df[(df['Time'] > dt_time(18, 0)) &
+                     (df['Global_active_power'] > 6) &
+                     (df['Sub_metering_2'] > df['Sub_metering_1']) &
+                     (df['Sub_metering_2'] > df['Sub_metering_3'])]
+
+    fh = filtered_df.iloc[:len(filtered_df) // 2]
+    sh = filtered_df.iloc[len(filtered_df) // 2:]
+    result = pd.concat([fh.iloc[2::3], sh.iloc[3::4]])
+
+    return result
+
+
+def filter_by_power_np(records, threshold=5.0):
+    return records[records['Global_active_power'] > threshold]
+
+
+def filter_by_voltage_np(records, threshold=235):
+    return records[records['Voltage'] > threshold]
+
+
+def filter_by_current_and_consumption_np(records, current_range=(19, 20)):
+    intensity = records['Global_intensity']
+    sub_metering_2 = records['Sub_metering_2']
+    mask = (intensity >= current_range[0]) & (intensity <= current_range[1]) & \
+           (sub_metering_2 > records['Sub_metering_3']) & (sub_metering_2 > records['Sub_metering_1'])
+    return records[mask]
+
+
+def random_sample_average_np(records, n=500000, rng=None):
+    rng = rng or np.random.default_rng()
+    indices = rng.integers(0, len(records), n)
+    return np.array([records[name][indices].mean(dtype=np.float64) for name in SUB_METERING])
+
+
+def complex_filter_np(records, after=time_of_day(18)):
+    sub_metering_2 = records['Sub_metering_2']
+    condition = (records['seconds'] >= after) & \
+                (records['Global_active_power'] > 6) & \
+                (sub_metering_2 > records['Sub_metering_1']) & \
+                (sub_metering_2 > records['Sub_metering_3'])
+
+    filtered = records[condition]
+
+    fh = filtered[:len(filtered) // 2]
+    sh = filtered[len(filtered) // 2:]
+    return np.concatenate([fh[2::3], sh[3::4]])
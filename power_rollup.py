@@ -0,0 +1,212 @@
+# Багаторівневі агрегати хвилинних даних споживання для запитів за часовими вікнами.
+#
+# PowerRollup один раз будує щільні погодинні, щоденні та помісячні кошики з кількістю,
+# сумою, сумою квадратів, мінімумом та максимумом кожної колонки; межі кошиків вкладені
+# (місяць починається з півночі, доба з початку години). Вікно [start, stop) розкладається
+# на повні кошики найгрубшого рівня, залишки по краях переходять на дрібніші рівні, а
+# останні неповні години беруться з сирих рядків, знайдених через searchsorted. Тому
+# запит торкається не більше ~2 * (31 + 24) кошиків, кількох десятків місяців та до двох
+# годин сирих рядків, незалежно від загальної кількості рядків.
+#
+# Суми зберігаються для значень, зсунутих на середнє колонки, щоб дисперсія з суми
+# квадратів не втрачала точність для Voltage (~240 В при розкиді в кілька вольт).
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from power_data import SECONDS_PER_DAY
+
+ROLLUP_COLUMNS = ['Global_active_power', 'Voltage', 'Global_intensity',
+                  'Sub_metering_1', 'Sub_metering_2', 'Sub_metering_3']
+
+SECONDS_PER_HOUR = 3600
+
+# Від найгрубшого до найдрібнішого, у такому порядку розкладається запит
+LEVELS = ('month', 'day', 'hour')
+
+Level = namedtuple('Level', ['edges', 'count', 'sum', 'sumsq', 'min', 'max'])
+
+
+def to_seconds(value):
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(np.datetime64(value, 's').astype(np.int64))
+
+
+# Межі кошиків усіх рівнів від початку першого до кінця останнього місяця даних
+def level_edges(first, last):
+    months = np.arange(np.datetime64(int(first), 's').astype('datetime64[M]'),
+                       np.datetime64(int(last), 's').astype('datetime64[M]') + 2)
+    month_edges = months.astype('datetime64[s]').astype(np.int64)
+    return {'month': month_edges,
+            'day': np.arange(month_edges[0], month_edges[-1] + 1, SECONDS_PER_DAY),
+            'hour': np.arange(month_edges[0], month_edges[-1] + 1, SECONDS_PER_HOUR)}
+
+
+# Агрегати сирих рядків у кошиках з межами edges;
+# порожні групи мають count 0, а мінімум і максимум +inf та -inf
+def _raw_level(edges, timestamps, columns, shifts):
+    bounds = np.searchsorted(timestamps, edges)
+    groups = len(edges) - 1
+    counts = np.diff(bounds)
+    nonempty = counts > 0
+    starts = bounds[:-1][nonempty]
+
+    sums = np.zeros((groups, len(columns)))
+    sumsq = np.zeros((groups, len(columns)))
+    mins = np.full((groups, len(columns)), np.inf)
+    maxs = np.full((groups, len(columns)), -np.inf)
+    if len(starts):
+        for j, values in enumerate(columns):
+            values = values[starts[0]:bounds[-1]]
+            shifted = values.astype(np.float64) - shifts[j]
+            offsets = starts - starts[0]
+            sums[nonempty, j] = np.add.reduceat(shifted, offsets)
+            sumsq[nonempty, j] = np.add.reduceat(shifted * shifted, offsets)
+            mins[nonempty, j] = np.minimum.reduceat(values, offsets)
+            maxs[nonempty, j] = np.maximum.reduceat(values, offsets)
+    return Level(edges, counts, sums, sumsq, mins, maxs)
+
+
+# Грубший рівень з дрібнішого: кожен кошик містить хоча б один дочірній
+def _parent_level(edges, child):
+    starts = np.searchsorted(child.edges, edges)[:-1]
+    return Level(edges, np.add.reduceat(child.count, starts), np.add.reduceat(child.sum, starts),
+                 np.add.reduceat(child.sumsq, starts), np.minimum.reduceat(child.min, starts),
+                 np.maximum.reduceat(child.max, starts))
+
+
+class PowerRollup:
+    def __init__(self, records, columns=ROLLUP_COLUMNS):
+        timestamps = records['timestamp']
+        if len(timestamps) > 1 and np.any(timestamps[1:] < timestamps[:-1]):
+            records = records[np.argsort(timestamps, kind='stable')]
+            timestamps = records['timestamp']
+        self.records = records
+        self.columns = list(columns)
+        self.column_index = {name: j for j, name in enumerate(self.columns)}
+        self.timestamps = timestamps
+        self.raw = [records[name] for name in self.columns]
+        self.shifts = np.array([float(values.mean(dtype=np.float64)) if len(values) else 0.0
+                                for values in self.raw])
+
+        self.levels = {}
+        if len(timestamps):
+            edges = level_edges(timestamps[0], timestamps[-1])
+            child = self.levels['hour'] = _raw_level(edges['hour'], timestamps, self.raw, self.shifts)
+            for name in ('day', 'month'):
+                child = self.levels[name] = _parent_level(edges[name], child)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def nbytes(self):
+        return sum(sum(array.nbytes for array in level) for level in self.levels.values())
+
+    def _add_raw(self, acc, lo, hi):
+        a, b = np.searchsorted(self.timestamps, [lo, hi])
+        if a == b:
+            return
+        acc['count'] += b - a
+        for j, values in enumerate(self.raw):
+            values = values[a:b]
+            shifted = values.astype(np.float64) - self.shifts[j]
+            acc['sum'][j] += shifted.sum()
+            acc['sumsq'][j] += np.dot(shifted, shifted)
+            acc['min'][j] = min(acc['min'][j], values.min())
+            acc['max'][j] = max(acc['max'][j], values.max())
+
+    def _collect(self, acc, lo, hi, depth=0):
+        if lo >= hi:
+            return
+        if depth == len(LEVELS):
+            self._add_raw(acc, lo, hi)
+            return
+        level = self.levels[LEVELS[depth]]
+        first = int(np.searchsorted(level.edges, lo, side='left'))
+        last = int(np.searchsorted(level.edges, hi, side='right')) - 1
+        if first >= last:
+            self._collect(acc, lo, hi, depth + 1)
+            return
+        acc['count'] += int(level.count[first:last].sum())
+        acc['sum'] += level.sum[first:last].sum(axis=0)
+        acc['sumsq'] += level.sumsq[first:last].sum(axis=0)
+        acc['min'] = np.minimum(acc['min'], level.min[first:last].min(axis=0))
+        acc['max'] = np.maximum(acc['max'], level.max[first:last].max(axis=0))
+        self._collect(acc, lo, level.edges[first], depth + 1)
+        self._collect(acc, level.edges[last], hi, depth + 1)
+
+    # Статистики колонок за вікно [start, stop), межі - секунди від епохи або дати;
+    # ddof=1 дає вибіркову дисперсію, як std у DataFrame.describe
+    def query(self, start=None, stop=None, columns=None, ddof=1):
+        width = len(self.columns)
+        acc = {'count': 0, 'sum': np.zeros(width), 'sumsq': np.zeros(width),
+               'min': np.full(width, np.inf), 'max': np.full(width, -np.inf)}
+        if self.levels:
+            edges = self.levels['month'].edges
+            lo = edges[0] if start is None else max(to_seconds(start), edges[0])
+            hi = edges[-1] if stop is None else min(to_seconds(stop), edges[-1])
+            self._collect(acc, lo, hi)
+
+        count = acc['count']
+        sums = acc['sum']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / count
+            variances = np.maximum(acc['sumsq'] - sums * means, 0.0) / (count - ddof) \
+                if count > ddof else np.full(width, np.nan)
+        empty = count == 0
+        result = {'count': count, 'sum': {}, 'mean': {}, 'var': {}, 'std': {}, 'min': {}, 'max': {}}
+        for name in columns or self.columns:
+            j = self.column_index[name]
+            result['sum'][name] = float(sums[j] + count * self.shifts[j])
+            result['mean'][name] = np.nan if empty else float(means[j] + self.shifts[j])
+            result['var'][name] = float(variances[j])
+            result['std'][name] = float(np.sqrt(variances[j]))
+            result['min'][name] = np.nan if empty else float(acc['min'][j])
+            result['max'][name] = np.nan if empty else float(acc['max'][j])
+        return result
+
+    # Передискретизація: значення stat ('count', 'mean', 'min', 'max', 'sum') для кожного
+    # непорожнього кошика рівня, індекс - початок кошика
+    def resample(self, level='day', stat='mean', columns=None):
+        columns = columns or self.columns
+        data = self.levels.get(level)
+        if data is None:
+            return pd.DataFrame(columns=columns)
+        nonempty = data.count > 0
+        index = pd.DatetimeIndex(data.edges[:-1][nonempty].astype('datetime64[s]'), name='start')
+        if stat == 'count':
+            return pd.DataFrame({'count': data.count[nonempty]}, index=index)
+
+        j = [self.column_index[name] for name in columns]
+        counts = data.count[nonempty, None]
+        if stat == 'mean':
+            values = data.sum[nonempty][:, j] / counts + self.shifts[j]
+        elif stat == 'sum':
+            values = data.sum[nonempty][:, j] + counts * self.shifts[j]
+        else:
+            values = getattr(data, stat)[nonempty][:, j]
+        return pd.DataFrame(values, index=index, columns=columns)
+
+
+# Ті самі статистики повним проходом по рядках, еталон для перевірки та бенчмарку
+def scan_statistics(records, start=None, stop=None, columns=ROLLUP_COLUMNS, ddof=1):
+    timestamps = records['timestamp']
+    mask = np.ones(len(records), dtype=bool)
+    if start is not None:
+        mask &= timestamps >= to_seconds(start)
+    if stop is not None:
+        mask &= timestamps < to_seconds(stop)
+    count = int(mask.sum())
+    result = {'count': count, 'sum': {}, 'mean': {}, 'var': {}, 'std': {}, 'min': {}, 'max': {}}
+    for name in columns:
+        values = records[name][mask].astype(np.float64)
+        variance = float(values.var(ddof=ddof)) if count > ddof else np.nan
+        result['sum'][name] = float(values.sum())
+        result['mean'][name] = float(values.mean()) if count else np.nan
+        result['var'][name] = variance
+        result['std'][name] = float(np.sqrt(variance))
+        result['min'][name] = float(values.min()) if count else np.nan
+        result['max'][name] = float(values.max()) if count else np.nan
+    return result
@@ -0,0 +1,129 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+# Simple linear regression y = k * x + b for one series or a stacked batch of series.
+#
+# x has shape (N,) or (series, N) and y has shape (..., N); everything is reduced along the
+# last axis. A fit only needs the sufficient statistics n, mean(x), mean(y) and the centered
+# sums Sxx = sum((x - mean_x) ** 2), Sxy, Syy. They carry the same information as
+# sum(x), sum(y), sum(x * y), sum(x * x) but do not cancel catastrophically when x or y
+# have a large offset.
+
+
+def sufficient_statistics(x, y):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    x, y = np.broadcast_arrays(x, y)
+    n = x.shape[-1]
+    mean_x = x.mean(axis=-1)
+    mean_y = y.mean(axis=-1)
+    dx = x - mean_x[..., None]
+    dy = y - mean_y[..., None]
+    return (n, mean_x, mean_y, np.einsum('...i,...i->...', dx, dx), np.einsum('...i,...i->...', dx, dy),
+            np.einsum('...i,...i->...', dy, dy))
+
+
+def fit_from_statistics(n, mean_x, mean_y, sxx, sxy):
+    k_hat = sxy / sxx
+    b_hat = mean_y - k_hat * mean_x
+    return k_hat, b_hat
+
+
+# Same closed form as least_squares_method in lab_6, for every series of the batch at once
+def least_squares_batch(x, y):
+    n, mean_x, mean_y, sxx, sxy, _ = sufficient_statistics(x, y)
+    return fit_from_statistics(n, mean_x, mean_y, sxx, sxy)
+
+
+# Mean squared error and its gradient for given k, b expressed through the statistics:
+# the residual y - k * x - b splits into a centered part and the offset r0 = mean_y - k * mean_x - b
+def loss_and_gradient(statistics, k, b):
+    n, mean_x, mean_y, sxx, sxy, syy = statistics
+    r0 = mean_y - k * mean_x - b
+    loss = (syy - 2 * k * sxy + k * k * sxx) / n + r0 * r0
+    gradient_k = (-2 / n) * (sxy - k * sxx) - 2 * mean_x * r0
+    gradient_b = -2 * r0
+    return loss, gradient_k, gradient_b
+
+
+# Full-batch gradient descent from fixed random initial values (np.random.rand in lab_6).
+# Each step only uses the statistics, so the cost is O(N) once plus O(1) per iteration and
+# series; losses[i] is the error after i + 1 iterations
+def gradient_descent_trajectory(x, y, learning_rate, n_iter, seed=0):
+    statistics = sufficient_statistics(x, y)
+    shape = np.shape(statistics[1])
+    rng = np.random.default_rng(seed)
+    k_hat = rng.random(shape)
+    b_hat = rng.random(shape)
+
+    losses = np.empty((n_iter,) + shape)
+    for i in range(n_iter):
+        _, gradient_k, gradient_b = loss_and_gradient(statistics, k_hat, b_hat)
+        k_hat = k_hat - learning_rate * gradient_k
+        b_hat = b_hat - learning_rate * gradient_b
+        losses[i] = loss_and_gradient(statistics, k_hat, b_hat)[0]
+    return k_hat, b_hat, losses
+
+
+# Online fit over chunks of a stream. Count, means and centered co-moments are updated with the
+# pairwise form of Welford's algorithm (Chan et al.), so a chunk is folded in the same way as
+# another partial state: states fitted on separate parts of a file in different processes merge
+# into the state of the whole file
+class OnlineLinearRegression:
+    def __init__(self):
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.sxx = 0.0
+        self.sxy = 0.0
+        self.syy = 0.0
+
+    def statistics(self):
+        return self.n, self.mean_x, self.mean_y, self.sxx, self.sxy, self.syy
+
+    def _combine(self, n, mean_x, mean_y, sxx, sxy, syy):
+        if n == 0:
+            return self
+        total = self.n + n
+        dx = mean_x - self.mean_x
+        dy = mean_y - self.mean_y
+        weight = self.n * n / total
+        self.sxx = self.sxx + sxx + dx * dx * weight
+        self.sxy = self.sxy + sxy + dx * dy * weight
+        self.syy = self.syy + syy + dy * dy * weight
+        self.mean_x = self.mean_x + dx * n / total
+        self.mean_y = self.mean_y + dy * n / total
+        self.n = total
+        return self
+
+    def partial_fit(self, x, y):
+        if np.shape(x)[-1] == 0:
+            return self
+        return self._combine(*sufficient_statistics(x, y))
+
+    def merge(self, other):
+        return self._combine(*other.statistics())
+
+    def coef(self):
+        return fit_from_statistics(self.n, self.mean_x, self.mean_y, self.sxx, self.sxy)
+
+    def loss(self, k, b):
+        return loss_and_gradient(self.statistics(), k, b)[0]
+
+
+def _fit_chunk(chunk, load=None):
+    x, y = load(chunk) if load is not None else chunk
+    return OnlineLinearRegression().partial_fit(x, y)
+
+
+# Fits chunks in a process pool and reduces the partial states. Chunks are (x, y) pairs,
+# or descriptors (e.g. file name and row range) that load turns into (x, y) inside the worker,
+# so large arrays do not have to be sent to the processes
+def fit_parallel(chunks, max_workers=None, load=None):
+    result = OnlineLinearRegression()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for state in executor.map(partial(_fit_chunk, load=load), chunks):
+            result.merge(state)
+    return result
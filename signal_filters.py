@@ -0,0 +1,117 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy.signal import butter, sosfilt, sosfilt_zi, sosfiltfilt
+
+
+# Проєкт фільтра Баттерворта у вигляді секцій другого порядку (SOS), кешований за
+# (cutoff, fs, order): перемальовування без зміни частоти зрізу не проєктує фільтр заново.
+# Масив спільний для всіх викликів, тому його не можна змінювати.
+@lru_cache(maxsize=64)
+def butter_lowpass_sos(cutoff, fs, order=5):
+    nyq = 0.5 * fs
+    normal_cutoff = cutoff / nyq
+    return butter(order, normal_cutoff, btype='low', analog=False, output='sos')
+
+
+# Фільтрація всього буфера вперед і назад (без фазового зсуву)
+def lowpass_filter(data, cutoff_freq, fs, order=5):
+    return sosfiltfilt(butter_lowpass_sos(cutoff_freq, fs, order), data)
+
+
+# Причинна потокова фільтрація: стан zi переноситься між порціями, тому сигнал
+# довільної довжини обробляється зі сталою вартістю на відлік
+class StreamingLowpass:
+    def __init__(self, cutoff_freq, fs, order=5):
+        self.cutoff_freq = cutoff_freq
+        self.fs = fs
+        self.order = order
+        self.sos = butter_lowpass_sos(cutoff_freq, fs, order)
+        self.zi = None
+        self.last = None
+
+    # Стан старого проєкту не відповідає новим секціям, тому zi перераховується як
+    # сталий стан нового фільтра для останнього вхідного відліку
+    def set_cutoff(self, cutoff_freq):
+        self.cutoff_freq = cutoff_freq
+        self.sos = butter_lowpass_sos(cutoff_freq, self.fs, self.order)
+        if self.last is not None:
+            self.zi = sosfilt_zi(self.sos) * self.last
+
+    def reset(self):
+        self.zi = None
+        self.last = None
+
+    def process(self, chunk):
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if not len(chunk):
+            return chunk
+        if self.zi is None:
+            # Початковий стан відповідає сталому сигналу з першим значенням порції
+            self.zi = sosfilt_zi(self.sos) * chunk[0]
+        filtered, self.zi = sosfilt(self.sos, chunk, zi=self.zi)
+        self.last = chunk[-1]
+        return filtered
+
+
+# Межі центрованого вікна як у np.convolve(mode='same'): [i - w // 2, i + (w - 1) // 2],
+# обрізані до меж сигналу, тому на краях середнє рахується лише по наявних відліках
+def _window_bounds(n, window):
+    index = np.arange(n)
+    start = np.clip(index - window // 2, 0, n)
+    end = np.clip(index + (window - 1) // 2 + 1, 0, n)
+    return start, end
+
+
+# Ковзне середнє за O(n) незалежно від розміру вікна через кумулятивну суму:
+# повні вікна рахуються різницею зрізів, неповні краї окремо
+def moving_average(data, window):
+    data = np.asarray(data, dtype=np.float64)
+    n = len(data)
+    csum = np.concatenate(([0.0], np.cumsum(data)))
+    if window > n:
+        start, end = _window_bounds(n, window)
+        return (csum[end] - csum[start]) / (end - start)
+
+    result = np.empty(n)
+    left = window // 2
+    right = left + n - window + 1
+    result[left:right] = (csum[window:] - csum[:n - window + 1]) / window
+
+    left_end = np.arange(left) + (window - 1) // 2 + 1
+    result[:left] = csum[left_end] / left_end
+    right_start = np.arange(right, n) - left
+    result[right:] = (csum[n] - csum[right_start]) / (n - right_start)
+    return result
+
+
+# Таблиця ковзних середніх для багатьох розмірів вікна з однієї кумулятивної суми:
+# рядок i відповідає вікну windows[i]
+def moving_average_table(data, windows):
+    data = np.asarray(data, dtype=np.float64)
+    csum = np.concatenate(([0.0], np.cumsum(data)))
+    start, end = _window_bounds(len(data), np.asarray(windows)[:, None])
+    return (csum[end] - csum[start]) / (end - start)
+
+
+# Ковзне середнє для потоку: хвіст з window - 1 останніх відліків переноситься між
+# порціями, середнє кожного нового відліку рахується через кумулятивну суму порції
+class RunningMean:
+    def __init__(self, window):
+        self.window = window
+        self.tail = np.empty(0)
+
+    def set_window(self, window):
+        self.window = window
+        self.tail = self.tail[len(self.tail) - (window - 1):] if window > 1 else self.tail[:0]
+
+    def reset(self):
+        self.tail = np.empty(0)
+
+    def process(self, chunk):
+        data = np.concatenate((self.tail, np.asarray(chunk, dtype=np.float64)))
+        csum = np.concatenate(([0.0], np.cumsum(data)))
+        end = np.arange(len(self.tail) + 1, len(data) + 1)
+        start = np.maximum(end - self.window, 0)
+        self.tail = data[len(data) - (self.window - 1):] if self.window > 1 else data[:0]
+        return (csum[end] - csum[start]) / (end - start)
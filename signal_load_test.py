@@ -0,0 +1,186 @@
+# Load test for the signal server: N concurrent client sessions move sliders through the
+# public ClientSession API.
+#
+# The Python client only applies server patches while its event loop runs, and
+# force_roundtrip discards them while it waits for its own reply, so the client cannot see
+# the recomputed columns arrive. Each slider change is therefore timed on the client as a
+# round trip (the server has received and handled the change once the reply comes back),
+# and the time until the new columns are applied is read from the server's
+# lab_5_bokeh.update histogram, which the locally started server exposes on
+# APP_METRICS_PORT (see instrumentation.py).
+#
+# Example:
+#   python signal_load_test.py --sessions 20 --interactions 30
+#   python signal_load_test.py --url http://localhost:5006/signal_server --sessions 50 \
+#       --metrics-url http://localhost:9464/metrics.json
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from bokeh.client import pull_session
+
+from bench_utils import summarize
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'signal_server')
+
+# Server-side stages reported next to the client round trips
+SERVER_STAGES = ('lab_5_bokeh.update', 'lab_5_bokeh.compute', 'lab_5_bokeh.apply')
+
+# Slider name and a generator of new values
+INTERACTIONS = {
+    'amplitude': ('amplitude', lambda rng: round(rng.uniform(0.1, 10.0), 1)),
+    'noise_std': ('noise_std', lambda rng: round(rng.uniform(0.0, 1.0), 1)),
+    'window_size': ('window_size', lambda rng: int(rng.integers(1, 51))),
+}
+
+
+def start_server(port, metrics_port, timeout=30):
+    env = dict(os.environ, APP_METRICS='1', APP_METRICS_PORT=str(metrics_port))
+    process = subprocess.Popen([sys.executable, '-m', 'bokeh', 'serve', APP_DIR, '--port', str(port)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env)
+    url = f'http://localhost:{port}/signal_server'
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).close()
+            return process, url
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"Bokeh server did not start on port {port}")
+
+
+def fetch_metrics(metrics_url, timeout=5):
+    with urllib.request.urlopen(metrics_url, timeout=timeout) as response:
+        return json.load(response)
+
+
+def update_count(metrics):
+    return metrics['latency_seconds'].get(SERVER_STAGES[0], {}).get('count', 0)
+
+
+# The last updates are still computed after the clients are done: poll until the
+# number of applied updates stops growing
+def wait_for_idle(metrics_url, poll_interval=0.2, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    metrics = fetch_metrics(metrics_url)
+    while time.perf_counter() < deadline:
+        time.sleep(poll_interval)
+        latest = fetch_metrics(metrics_url)
+        if update_count(latest) == update_count(metrics):
+            return latest
+        metrics = latest
+    return metrics
+
+
+# Server stages during the load test: counts and means are differences to the snapshot
+# taken before it, quantiles are bucket upper bounds from the server histograms
+def server_latencies(before, after):
+    results = []
+    for name in SERVER_STAGES:
+        data = after['latency_seconds'].get(name)
+        if data is None:
+            continue
+        previous = before['latency_seconds'].get(name, {'count': 0, 'sum': 0.0})
+        count = data['count'] - previous['count']
+        if count:
+            results.append({'stage': name, 'count': count, 'mean': (data['sum'] - previous['sum']) / count,
+                            'p50': data['p50'], 'p90': data['p90'], 'p99': data['p99'], 'max': data['max']})
+    return results
+
+
+def run_session(url, interactions, seed, think_time, barrier):
+    rng = np.random.default_rng(seed)
+    latencies = {name: [] for name in INTERACTIONS}
+    session = pull_session(url=url)
+    try:
+        doc = session.document
+        barrier.wait()
+        names = list(INTERACTIONS)
+        for i in range(interactions):
+            name = names[i % len(names)]
+            slider_name, new_value = INTERACTIONS[name]
+            slider = doc.get_model_by_name(slider_name)
+            value = new_value(rng)
+            while value == slider.value:
+                value = new_value(rng)
+
+            start = time.perf_counter()
+            slider.value = value
+            session.force_roundtrip()
+            latencies[name].append(time.perf_counter() - start)
+            time.sleep(think_time)
+    finally:
+        session.close()
+    return latencies
+
+
+def run(url, sessions=10, interactions=30, think_time=0.05, seed=0):
+    barrier = threading.Barrier(sessions)
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [pool.submit(run_session, url, interactions, seed + i, think_time, barrier)
+                   for i in range(sessions)]
+        per_session = [future.result() for future in futures]
+
+    results = []
+    for name in INTERACTIONS:
+        samples = [latency for latencies in per_session for latency in latencies[name]]
+        if samples:
+            result = summarize(samples)
+            result.update(interaction=name, sessions=sessions)
+            results.append(result)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for the signal Bokeh server")
+    parser.add_argument('--url', default=None, help="running app, by default signal_server is started locally")
+    parser.add_argument('--port', type=int, default=5106)
+    parser.add_argument('--metrics-port', type=int, default=9564, help="metrics port of the local server")
+    parser.add_argument('--metrics-url', default=None,
+                        help="metrics.json of a running app started with APP_METRICS_PORT")
+    parser.add_argument('--sessions', type=int, default=10)
+    parser.add_argument('--interactions', type=int, default=30, help="slider changes per session")
+    parser.add_argument('--think-time', type=float, default=0.05, help="pause between interactions, seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.url:
+        process, url, metrics_url = None, args.url, args.metrics_url
+    else:
+        process, url = start_server(args.port, args.metrics_port)
+        metrics_url = f'http://127.0.0.1:{args.metrics_port}/metrics.json'
+    try:
+        before = fetch_metrics(metrics_url) if metrics_url else None
+        results = run(url, args.sessions, args.interactions, args.think_time, args.seed)
+        server = server_latencies(before, wait_for_idle(metrics_url)) if metrics_url else []
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    for r in results:
+        print(f"{r['interaction']:>12} x{r['repeats']:<5} round trip median {r['median'] * 1e3:8.2f} ms, "
+              f"p90 {r['p90'] * 1e3:8.2f} ms, p99 {r['p99'] * 1e3:8.2f} ms, max {r['max'] * 1e3:8.2f} ms")
+    for r in server:
+        print(f"{r['stage']:>20} x{r['count']:<5} mean {r['mean'] * 1e3:8.2f} ms, p50 <= {r['p50'] * 1e3:g} ms, "
+              f"p90 <= {r['p90'] * 1e3:g} ms, p99 <= {r['p99'] * 1e3:g} ms, max {r['max'] * 1e3:8.2f} ms")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'url': url, 'sessions': args.sessions, 'results': results, 'server': server}, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+# Directory app: bokeh serve signal_server
+# lab_5_bokeh is imported once per server process, so the time axis, themes, noise
+# realizations and worker pool are shared while every session gets its own SignalSession
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bokeh.plotting import curdoc
+from lab_5_bokeh import SignalSession
+
+SignalSession(curdoc())
@@ -0,0 +1,17 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import lab_5_bokeh
+
+
+# Shared precomputation is done before the first session connects
+def on_server_loaded(server_context):
+    lab_5_bokeh.warm_up(server_context)
+
+
+def on_server_unloaded(server_context):
+    lab_5_bokeh.shutdown(server_context)
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from power_data import MEASUREMENTS, POWER_DTYPE, SECONDS_PER_DAY
+from power_rollup import ROLLUP_COLUMNS, PowerRollup, scan_statistics
+
+START = int(np.datetime64('2007-01-29T22:17', 's').astype(np.int64))
+STATS = ('sum', 'mean', 'var', 'std', 'min', 'max')
+
+
+# Хвилинні записи на ~70 днів через межі місяців: випадкові пропуски окремих хвилин
+# та кількаденна дірка, що захоплює кінець лютого
+def make_records(seed=0, minutes=100000):
+    rng = np.random.default_rng(seed)
+    timestamps = START + 60 * np.arange(minutes, dtype=np.int64)
+    keep = rng.random(minutes) > 0.2
+    keep &= ~((timestamps >= START + 28 * SECONDS_PER_DAY + 5000) & (timestamps < START + 33 * SECONDS_PER_DAY))
+    timestamps = timestamps[keep]
+
+    records = np.empty(len(timestamps), dtype=POWER_DTYPE)
+    records['timestamp'] = timestamps
+    records['seconds'] = timestamps % SECONDS_PER_DAY
+    for name in MEASUREMENTS:
+        records[name] = rng.gamma(1.5, 2.0, len(timestamps))
+    records['Voltage'] = rng.normal(240.0, 3.0, len(timestamps))
+    records['Sub_metering_1'] = rng.integers(0, 40, len(timestamps))
+    return records
+
+
+def random_windows(records, seed=1, n=40):
+    rng = np.random.default_rng(seed)
+    first, last = int(records['timestamp'][0]), int(records['timestamp'][-1])
+    bounds = np.sort(rng.integers(first - SECONDS_PER_DAY, last + SECONDS_PER_DAY, (n, 2)), axis=1)
+    return [(int(lo), int(hi)) for lo, hi in bounds]
+
+
+def assert_same_statistics(actual, expected):
+    assert actual['count'] == expected['count']
+    for stat in STATS:
+        for name in ROLLUP_COLUMNS:
+            np.testing.assert_allclose(actual[stat][name], expected[stat][name], rtol=1e-9, atol=1e-6,
+                                       err_msg=f"{stat} {name}")
+
+
+@pytest.fixture(scope='module')
+def records():
+    return make_records()
+
+
+@pytest.fixture(scope='module')
+def rollup(records):
+    return PowerRollup(records)
+
+
+def test_query_matches_scan_on_random_windows(records, rollup):
+    for start, stop in random_windows(records):
+        assert_same_statistics(rollup.query(start, stop), scan_statistics(records, start, stop))
+
+
+def test_query_matches_scan_on_edge_windows(records, rollup):
+    first = int(records['timestamp'][0])
+    midnight = first - first % SECONDS_PER_DAY + SECONDS_PER_DAY
+    windows = [(None, None), (None, first + 86399), (first + 3601, None),
+               # Межі точно на кошиках та на одну секунду поруч
+               (midnight, midnight + 3 * SECONDS_PER_DAY), (midnight - 1, midnight + 3600 + 1),
+               ('2007-02-01', '2007-04-01'), ('2007-02-01T00:00:01', '2007-03-31T23:59:59'),
+               # Вікно всередині однієї години та всередині дірки
+               (midnight + 600, midnight + 1260), (START + 29 * SECONDS_PER_DAY, START + 32 * SECONDS_PER_DAY)]
+    for start, stop in windows:
+        assert_same_statistics(rollup.query(start, stop), scan_statistics(records, start, stop))
+
+
+@pytest.mark.parametrize('start, stop', [(0, 0), (START + 5000, START + 5000), (START + 9000, START + 100),
+                                         (START - 10 * SECONDS_PER_DAY, START - SECONDS_PER_DAY)])
+def test_empty_window(rollup, start, stop):
+    result = rollup.query(start, stop)
+
+    assert result['count'] == 0
+    for stat in ('mean', 'var', 'min', 'max'):
+        assert all(np.isnan(value) for value in result[stat].values())
+    assert all(value == 0.0 for value in result['sum'].values())
+
+
+def test_unsorted_records_match_sorted(records, rollup):
+    shuffled = records[np.random.default_rng(2).permutation(len(records))]
+    start, stop = random_windows(records, seed=3, n=1)[0]
+
+    assert_same_statistics(PowerRollup(shuffled).query(start, stop), rollup.query(start, stop))
+
+
+@pytest.mark.parametrize('level, freq', [('hour', 'h'), ('day', 'D'), ('month', 'M')])
+@pytest.mark.parametrize('stat', ['count', 'mean', 'min', 'max', 'sum'])
+def test_resample_matches_groupby(records, rollup, level, freq, stat):
+    index = pd.DatetimeIndex(records['timestamp'].astype('datetime64[s]'))
+    frame = pd.DataFrame({name: records[name].astype(np.float64) for name in ROLLUP_COLUMNS}, index=index)
+    keys = index.to_period('M').to_timestamp() if freq == 'M' else index.floor(freq)
+    groups = frame.groupby(keys)
+    expected = groups.size().to_frame('count') if stat == 'count' else groups.agg(stat)
+
+    actual = rollup.resample(level, stat)
+    np.testing.assert_array_equal(actual.index.values.astype('datetime64[s]'),
+                                  expected.index.values.astype('datetime64[s]'))
+    assert list(actual.columns) == list(expected.columns)
+    np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-9)
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from regression import (OnlineLinearRegression, fit_parallel, least_squares_batch, loss_and_gradient,
+                        sufficient_statistics)
+
+# Uneven chunk sizes with an empty chunk in the middle
+CHUNK_BOUNDS = [0, 1, 7, 7, 150, 151, 400]
+
+
+def make_data(n=400, seed=0, offset=0.0):
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(0, 10, n) + offset
+    y = 2.5 * x - 3.0 + rng.normal(0, 1.0, n)
+    return x, y
+
+
+def split(x, y, bounds=CHUNK_BOUNDS):
+    return [(x[a:b], y[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+# Chunk descriptors for fit_parallel(load=...): the data is rebuilt inside the worker
+def load_range(chunk):
+    seed, a, b = chunk
+    x, y = make_data(seed=seed)
+    return x[a:b], y[a:b]
+
+
+@pytest.mark.parametrize('offset', [0.0, 1e6])
+def test_partial_fit_matches_polyfit(offset):
+    x, y = make_data(offset=offset)
+    model = OnlineLinearRegression()
+    for x_chunk, y_chunk in split(x, y):
+        model.partial_fit(x_chunk, y_chunk)
+
+    assert model.n == len(x)
+    np.testing.assert_allclose(model.coef(), np.polyfit(x, y, 1), rtol=1e-9)
+
+
+def test_merge_matches_polyfit():
+    x, y = make_data()
+    states = [OnlineLinearRegression().partial_fit(x_chunk, y_chunk) for x_chunk, y_chunk in split(x, y)]
+    model = OnlineLinearRegression()
+    for state in reversed(states):
+        model.merge(state)
+
+    assert model.n == len(x)
+    np.testing.assert_allclose(model.coef(), np.polyfit(x, y, 1), rtol=1e-9)
+
+
+def test_empty_chunks_leave_state_unchanged():
+    x, y = make_data()
+    model = OnlineLinearRegression().partial_fit(x, y)
+    before = model.statistics()
+    model.partial_fit(x[:0], y[:0])
+    model.merge(OnlineLinearRegression())
+
+    assert model.statistics() == before
+
+
+def test_loss_matches_direct_mean_squared_error():
+    x, y = make_data()
+    model = OnlineLinearRegression().partial_fit(x, y)
+
+    assert model.loss(2.0, -1.0) == pytest.approx(np.mean((2.0 * x - 1.0 - y) ** 2), rel=1e-9)
+
+
+def test_loss_and_gradient_match_finite_differences():
+    x, y = make_data()
+    statistics = sufficient_statistics(x, y)
+    k, b, step = 2.0, -1.0, 1e-6
+    loss, gradient_k, gradient_b = loss_and_gradient(statistics, k, b)
+
+    assert loss == pytest.approx(np.mean((k * x + b - y) ** 2), rel=1e-9)
+    assert gradient_k == pytest.approx((loss_and_gradient(statistics, k + step, b)[0] -
+                                        loss_and_gradient(statistics, k - step, b)[0]) / (2 * step), rel=1e-6)
+    assert gradient_b == pytest.approx((loss_and_gradient(statistics, k, b + step)[0] -
+                                        loss_and_gradient(statistics, k, b - step)[0]) / (2 * step), rel=1e-6)
+
+
+def test_least_squares_batch_matches_polyfit():
+    series = [make_data(seed=seed) for seed in range(3)]
+    x = np.stack([s[0] for s in series])
+    y = np.stack([s[1] for s in series])
+    k, b = least_squares_batch(x, y)
+
+    for i, (xs, ys) in enumerate(series):
+        np.testing.assert_allclose((k[i], b[i]), np.polyfit(xs, ys, 1), rtol=1e-9)
+
+
+def test_fit_parallel_matches_polyfit():
+    x, y = make_data()
+    model = fit_parallel(split(x, y), max_workers=2)
+
+    assert model.n == len(x)
+    np.testing.assert_allclose(model.coef(), np.polyfit(x, y, 1), rtol=1e-9)
+
+
+def test_fit_parallel_with_loader():
+    x, y = make_data(seed=3)
+    chunks = [(3, a, b) for a, b in zip(CHUNK_BOUNDS[:-1], CHUNK_BOUNDS[1:])]
+    model = fit_parallel(chunks, max_workers=2, load=load_range)
+
+    np.testing.assert_allclose(model.coef(), np.polyfit(x, y, 1), rtol=1e-9)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from scipy.signal import sosfilt, sosfilt_zi
+
+from signal_filters import StreamingLowpass, butter_lowpass_sos
+
+FS = 1000.0
+
+
+def make_signal(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / FS
+    return 2.0 + np.sin(2 * np.pi * 5 * t) + rng.normal(0, 0.3, n)
+
+
+@pytest.mark.parametrize('chunk_sizes', [[5000], [1] * 50 + [4950], [7, 0, 993, 1000, 3000], [333] * 15 + [5]])
+def test_chunked_output_matches_one_shot_sosfilt(chunk_sizes):
+    data = make_signal()
+    sos = butter_lowpass_sos(20.0, FS)
+    expected = sosfilt(sos, data, zi=sosfilt_zi(sos) * data[0])[0]
+
+    lowpass = StreamingLowpass(20.0, FS)
+    bounds = np.cumsum([0] + chunk_sizes)
+    output = np.concatenate([lowpass.process(data[a:b]) for a, b in zip(bounds[:-1], bounds[1:])])
+
+    np.testing.assert_allclose(output, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_reset_starts_from_the_next_chunk():
+    data = make_signal()
+    lowpass = StreamingLowpass(20.0, FS)
+    lowpass.process(data[:1000])
+    lowpass.reset()
+
+    np.testing.assert_allclose(lowpass.process(data[1000:]), StreamingLowpass(20.0, FS).process(data[1000:]))
+
+
+# Сталий сигнал лишається сталим після зміни частоти зрізу: стан перераховано для нового
+# проєкту, а не перенесено зі старого
+def test_set_cutoff_has_no_transient_on_a_constant_signal():
+    lowpass = StreamingLowpass(20.0, FS)
+    np.testing.assert_allclose(lowpass.process(np.full(500, 3.0)), 3.0)
+    lowpass.set_cutoff(80.0)
+
+    assert lowpass.cutoff_freq == 80.0
+    np.testing.assert_allclose(lowpass.process(np.full(500, 3.0)), 3.0)
+
+
+def test_set_cutoff_continues_with_the_new_design():
+    data = make_signal()
+    lowpass = StreamingLowpass(20.0, FS)
+    lowpass.process(data[:2500])
+    lowpass.set_cutoff(50.0)
+    output = lowpass.process(data[2500:])
+
+    sos = butter_lowpass_sos(50.0, FS)
+    expected = sosfilt(sos, data[2500:], zi=sosfilt_zi(sos) * data[2499])[0]
+    np.testing.assert_allclose(output, expected, rtol=1e-12, atol=1e-12)
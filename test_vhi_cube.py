@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vhi_cube import VhiCube
+
+
+def make_frame(seed=0, regions=(1, 2, 5), years=range(2000, 2004)):
+    rng = np.random.default_rng(seed)
+    rows = [(region, year, week) for region in regions for year in years for week in range(1, 53)
+            if not (region == 5 and year == 2001)]
+    df = pd.DataFrame(rows, columns=['region_id', 'Year', 'Week'])
+    for index in ('VHI', 'VCI', 'TCI'):
+        df[index] = np.round(rng.uniform(0, 100, len(df)), 2)
+    # Кілька значень на межах діапазону та однакові значення в групі
+    df.loc[:3, 'VHI'] = [0.0, 100.0, 15.0, 15.0]
+    return df
+
+
+def count_below_scan(df, cube, index, threshold, years, inclusive=False):
+    start, stop = cube.year_window(years)
+    result = np.zeros((len(cube.region_ids), stop - start), dtype=np.int64)
+    for i, region in enumerate(cube.region_ids):
+        for j, year in enumerate(cube.years[start:stop]):
+            values = df.loc[(df['region_id'] == region) & (df['Year'] == year), index]
+            result[i, j] = (values <= threshold).sum() if inclusive else (values < threshold).sum()
+    return result
+
+
+@pytest.mark.parametrize('threshold', [-1000.0, -150.0, -0.5, 0.0, 15.0, 35.5, 100.0, 100.5, 950.0, 5000.0])
+@pytest.mark.parametrize('inclusive', [False, True])
+def test_count_below_matches_scan(threshold, inclusive):
+    df = make_frame()
+    cube = VhiCube(df)
+    for years in [(2000, 2003), (2001, 2002), (1990, 2010)]:
+        np.testing.assert_array_equal(cube.count_below('VHI', threshold, years, inclusive),
+                                      count_below_scan(df, cube, 'VHI', threshold, years, inclusive))
+
+
+def test_count_between_out_of_range_covers_every_value():
+    df = make_frame()
+    cube = VhiCube(df)
+
+    counts = cube.count_between('TCI', -500, 500, (2000, 2003))
+    np.testing.assert_array_equal(counts, cube.count['TCI'])
@@ -0,0 +1,142 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from vhi_download import (EmptyResponseError, canonical_path, create_session, download_all,
+                          download_province, split_noaa_text)
+
+
+def noaa_page(province_id, year1, year2):
+    lines = [f"<br>Province= {province_id}: Test", "year,week, SMN,SMT,VCI,TCI,VHI<br>"]
+    lines += [f"{year},{week:3d},0.100,270.00, 50.00, 40.00, {year % 100 + week / 100:6.2f},"
+              for year in range(year1, year2 + 1) for week in range(1, 53)]
+    lines[2] = "<tt><pre>" + lines[2]
+    lines.append("</pre></tt>")
+    return "\n".join(lines) + "\n"
+
+
+# Імітація get_TS_admin.php: statuses - черга кодів відповіді для кожної області,
+# empty - області, для яких повертається сторінка без даних з кодом 200
+class NoaaHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        province_id = int(params['provinceID'])
+        server = self.server
+        with server.lock:
+            server.requests.append(params)
+            queue = server.statuses.get(province_id, [])
+            status = queue.pop(0) if queue else 200
+        if status != 200:
+            self.send_error(status)
+            return
+        if province_id in server.empty:
+            body = "<html><body>Service temporarily unavailable</body></html>\n"
+        else:
+            body = noaa_page(province_id, int(params['year1']), int(params['year2']))
+        body = body.encode('latin-1')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def noaa_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), NoaaHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.statuses = {}
+    server.empty = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}/get_TS_admin.php"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def stored_weeks(path):
+    with open(path, encoding='latin-1') as f:
+        _, rows, _ = split_noaa_text(f.read())
+    return [(year, week) for year, week, _ in rows]
+
+
+def test_retries_server_errors(noaa_server, tmp_path):
+    noaa_server.statuses[1] = [503, 502]
+    session = create_session(retries=3, backoff_factor=0)
+    result = download_province(session, 1, str(tmp_path), 2000, 2001, base_url=noaa_server.base_url)
+
+    assert result.error is None
+    assert result.rows_added == 2 * 52
+    assert len(noaa_server.requests) == 3
+
+
+def test_replaces_file_atomically(noaa_server, tmp_path):
+    path = canonical_path(str(tmp_path), 1)
+    with open(path, 'w') as f:
+        f.write("stale\n")
+    session = create_session(backoff_factor=0)
+    download_province(session, 1, str(tmp_path), 2000, 2000, base_url=noaa_server.base_url)
+
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+    assert stored_weeks(path) == [(2000, week) for week in range(1, 53)]
+
+
+def test_incremental_refresh(noaa_server, tmp_path):
+    folder = str(tmp_path)
+    session = create_session(backoff_factor=0)
+    download_province(session, 1, folder, 1990, 2000, base_url=noaa_server.base_url)
+    result = download_province(session, 1, folder, 1990, 2002, base_url=noaa_server.base_url)
+
+    # Повторно запитується лише останній збережений рік
+    assert noaa_server.requests[-1]['year1'] == '2000'
+    assert result.rows_added == 2 * 52
+    weeks = stored_weeks(canonical_path(folder, 1))
+    assert weeks == [(year, week) for year in range(1990, 2003) for week in range(1, 53)]
+
+
+@pytest.mark.parametrize('year1', [2000, 2002, 2004])
+def test_refresh_from_later_year_keeps_older_rows(noaa_server, tmp_path, year1):
+    folder = str(tmp_path)
+    session = create_session(backoff_factor=0)
+    download_province(session, 1, folder, 1990, 2000, base_url=noaa_server.base_url)
+    download_province(session, 1, folder, year1, 2005, base_url=noaa_server.base_url)
+
+    # Запит починається з останнього збереженого року, тож немає ні втрат, ні пропуску
+    assert noaa_server.requests[-1]['year1'] == '2000'
+    weeks = stored_weeks(canonical_path(folder, 1))
+    assert weeks == [(year, week) for year in range(1990, 2006) for week in range(1, 53)]
+
+
+def test_empty_response_keeps_existing_file(noaa_server, tmp_path):
+    folder = str(tmp_path)
+    session = create_session(backoff_factor=0)
+    download_province(session, 1, folder, 1990, 2000, base_url=noaa_server.base_url)
+    path = canonical_path(folder, 1)
+    with open(path, 'rb') as f:
+        before = f.read()
+
+    noaa_server.empty.add(1)
+    with pytest.raises(EmptyResponseError):
+        download_province(session, 1, folder, 1990, 2002, base_url=noaa_server.base_url)
+    with open(path, 'rb') as f:
+        assert f.read() == before
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+
+def test_download_all_reports_failures_per_province(noaa_server, tmp_path):
+    noaa_server.statuses[2] = [404]
+    noaa_server.empty.add(3)
+    results = download_all([1, 2, 3, 4], str(tmp_path), max_workers=2, session=create_session(backoff_factor=0),
+                           year1=2000, year2=2000, base_url=noaa_server.base_url)
+
+    assert [r.province_id for r in results] == [1, 2, 3, 4]
+    assert [r.error is None for r in results] == [True, False, False, True]
+    assert isinstance(results[2].error, EmptyResponseError)
+    assert sorted(os.listdir(tmp_path)) == ['vhi_id__1__mean.csv', 'vhi_id__4__mean.csv']
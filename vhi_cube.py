@@ -0,0 +1,117 @@
+# Щільний куб агрегатів VHI/VCI/TCI за (регіон, рік), побудований за один прохід.
+#
+# Для кожного індексу зберігаються кількість, мінімум, максимум та префіксні суми
+# кількості й суми вздовж років, тож середнє за будь-яке вікно років рахується за O(1)
+# на регіон. Для порогових лічильників значення відсортовані всередині кожної групи
+# (регіон, рік), тому кількість значень нижче довільного порогу знаходиться одним
+# векторним searchsorted по всіх групах вікна без повторного сканування таблиці.
+#
+# Складений ключ group * key_step + (value - low) зростає вздовж усього масиву, бо крок
+# більший за розкид значень індексу. Позиції порогу обмежуються межами своєї групи,
+# тому поріг поза діапазоном значень не потрапляє в ключі сусідньої групи.
+import numpy as np
+import pandas as pd
+
+INDICES = ('VHI', 'VCI', 'TCI')
+
+
+class VhiCube:
+    def __init__(self, df, indices=INDICES):
+        years = pd.to_numeric(df['Year']).to_numpy(dtype=np.int64)
+        region_values = df['region_id'].to_numpy(dtype=np.int64)
+
+        self.region_ids = np.unique(region_values)
+        self.years = np.arange(years.min(), years.max() + 1)
+        self.shape = (len(self.region_ids), len(self.years))
+        n_groups = self.shape[0] * self.shape[1]
+
+        group = np.searchsorted(self.region_ids, region_values) * self.shape[1] + (years - self.years[0])
+        self.count = {}
+        self.min = {}
+        self.max = {}
+        self.count_prefix = {}
+        self.sum_prefix = {}
+        self.sorted_keys = {}
+        self.key_base = {}
+        self.offsets = {}
+
+        for index in indices:
+            values = df[index].to_numpy(dtype=np.float64)
+            order = np.lexsort((values, group))
+            sorted_group = group[order]
+            sorted_values = values[order]
+
+            count = np.bincount(group, minlength=n_groups)
+            offsets = np.concatenate(([0], np.cumsum(count)))
+            sums = np.bincount(group, weights=values, minlength=n_groups)
+
+            # Після сортування мінімум групи стоїть першим, а максимум останнім
+            present = count > 0
+            minimum = np.full(n_groups, np.nan)
+            maximum = np.full(n_groups, np.nan)
+            minimum[present] = sorted_values[offsets[:-1][present]]
+            maximum[present] = sorted_values[offsets[1:][present] - 1]
+
+            count = count.reshape(self.shape)
+            self.count[index] = count
+            self.min[index] = minimum.reshape(self.shape)
+            self.max[index] = maximum.reshape(self.shape)
+            self.count_prefix[index] = np.pad(np.cumsum(count, axis=1), ((0, 0), (1, 0)))
+            self.sum_prefix[index] = np.pad(np.cumsum(sums.reshape(self.shape), axis=1), ((0, 0), (1, 0)))
+            low = float(sorted_values.min()) if len(sorted_values) else 0.0
+            key_step = float(sorted_values.max()) - low + 1.0 if len(sorted_values) else 1.0
+            self.sorted_keys[index] = sorted_group * key_step + (sorted_values - low)
+            self.key_base[index] = (low, key_step)
+            self.offsets[index] = offsets
+
+    # Межі вікна років у координатах куба (півінтервал [start, stop))
+    def year_window(self, years):
+        start = int(np.searchsorted(self.years, years[0], side='left'))
+        stop = int(np.searchsorted(self.years, years[1], side='right'))
+        return start, max(start, stop)
+
+    def _groups(self, start, stop):
+        return (np.arange(self.shape[0])[:, None] * self.shape[1] + np.arange(start, stop)[None, :])
+
+    def region_stats(self, index='VHI', years=None):
+        start, stop = self.year_window(years) if years is not None else (0, self.shape[1])
+        count = self.count_prefix[index][:, stop] - self.count_prefix[index][:, start]
+        total = self.sum_prefix[index][:, stop] - self.sum_prefix[index][:, start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+        if stop > start:
+            minimum = np.fmin.reduce(self.min[index][:, start:stop], axis=1)
+            maximum = np.fmax.reduce(self.max[index][:, start:stop], axis=1)
+        else:
+            minimum = maximum = np.full(self.shape[0], np.nan)
+        return pd.DataFrame({'region_id': self.region_ids, 'count': count, 'min': minimum,
+                             'max': maximum, 'mean': mean})
+
+    # Кількість значень нижче порогу для кожної пари (регіон, рік) у вікні;
+    # inclusive=True рахує також значення, що дорівнюють порогу
+    def count_below(self, index, threshold, years=None, inclusive=False):
+        start, stop = self.year_window(years) if years is not None else (0, self.shape[1])
+        groups = self._groups(start, stop)
+        side = 'right' if inclusive else 'left'
+        low, key_step = self.key_base[index]
+        offsets = self.offsets[index]
+        positions = np.searchsorted(self.sorted_keys[index], groups * key_step + (threshold - low), side=side)
+        return np.clip(positions, offsets[groups], offsets[groups + 1]) - offsets[groups]
+
+    def count_between(self, index, low, high, years=None):
+        return self.count_below(index, high, years, inclusive=True) - self.count_below(index, low, years)
+
+    # Аналог drought_years_analysis з lab_2: кількість тижневих значень за рік по всіх
+    # регіонах порівнюється з часткою від кількості регіонів
+    def drought_years(self, years_range=(1981, 2024), threshold_extreme=15, threshold_moderate=(15, 35),
+                      percent_threshold=20, index='VHI'):
+        start, stop = self.year_window(years_range)
+        window_years = self.years[start:stop]
+        min_regions_affected = (percent_threshold / 100) * self.shape[0]
+
+        extreme = self.count_below(index, threshold_extreme, years_range).sum(axis=0)
+        moderate = self.count_between(index, threshold_moderate[0], threshold_moderate[1], years_range).sum(axis=0)
+
+        extreme_drought_years = window_years[extreme >= min_regions_affected].tolist()
+        moderate_drought_years = window_years[moderate >= min_regions_affected].tolist()
+        return extreme_drought_years, moderate_drought_years
@@ -0,0 +1,211 @@
+import glob
+import json
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+HEADERS = ['Year', 'Week', 'SMN', 'SMT', 'VCI', 'TCI', 'VHI', 'empty']
+
+# Перенумерація областей NOAA у порядок reg_id_name з lab_3
+EXCLUDED_REGIONS = (12, 20)
+REGION_REMAP = {1: 22, 2: 24, 3: 23, 4: 25, 5: 3, 6: 4, 7: 8, 8: 19, 9: 20, 10: 21,
+                11: 9, 13: 10, 14: 11, 15: 12, 16: 13, 17: 14, 18: 15, 19: 16, 21: 17,
+                22: 18, 23: 6, 24: 1, 25: 2, 26: 6, 27: 5}
+
+# Типізований запис одного тижня спостережень, у такому вигляді дані лежать у кеші
+RECORD_DTYPE = np.dtype([('region_id', np.int16), ('Year', np.int16), ('Week', np.int16),
+                         ('SMN', np.float32), ('SMT', np.float32), ('VCI', np.float32),
+                         ('TCI', np.float32), ('VHI', np.float32)])
+
+CACHE_VERSION = 1
+COMBINED_FILE = 'combined.npy'
+MANIFEST_FILE = 'manifest.json'
+
+# Кількість файлів, з якої пул окупає запуск процесів: fork коштує десятки мілісекунд,
+# а spawn та forkserver заново імпортують pandas у кожному процесі (близько секунди)
+# при ~10 мс на розбір одного файлу
+PARALLEL_MIN_FILES = {'fork': 32, 'spawn': 200, 'forkserver': 200}
+
+# Результат розбору одного файлу: records або текст помилки
+FileResult = namedtuple('FileResult', ['path', 'records', 'error'])
+
+
+class VhiLoadError(Exception):
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__('; '.join(f"{os.path.basename(r.path)}: {r.error}" for r in failures))
+
+
+# Функція для розбору одного CSV файлу NOAA
+def parse_vhi_file(file):
+    region_id = int(file.split('__')[1])
+    df = pd.read_csv(file, header=1, names=HEADERS)
+    df.at[0, 'Year'] = df.at[0, 'Year'][9:]
+    df = df.drop(df.index[-1])
+    df = df[df['VHI'] != -1]
+    df = df.drop('empty', axis=1)
+    df.insert(0, 'region_id', region_id, True)
+    df['Week'] = df['Week'].astype(int)
+    return df
+
+
+def frame_to_records(df):
+    records = np.empty(len(df), dtype=RECORD_DTYPE)
+    for name in RECORD_DTYPE.names:
+        records[name] = df[name].to_numpy().astype(RECORD_DTYPE[name])
+    return records
+
+
+def records_to_frame(records):
+    return pd.DataFrame({name: np.asarray(records[name]) for name in RECORD_DTYPE.names})
+
+
+# Обробник для пулу процесів: виправлення заголовка, відкидання VHI == -1 та region_id
+# виконуються в parse_vhi_file, назад передається лише компактний типізований масив
+def parse_file_result(file):
+    try:
+        return FileResult(file, frame_to_records(parse_vhi_file(file)), None)
+    except Exception as e:
+        return FileResult(file, None, f"{type(e).__name__}: {e}")
+
+
+# Паралельний розбір файлів, результати повертаються в порядку files;
+# max_workers=1 розбирає файли послідовно в поточному процесі, а max_workers=None
+# вмикає пул лише на кількох ядрах і від PARALLEL_MIN_FILES файлів
+def parse_files(files, max_workers=None):
+    files = list(files)
+    if max_workers is None and ((os.cpu_count() or 1) < 2 or
+                                len(files) < PARALLEL_MIN_FILES.get(multiprocessing.get_start_method(), 200)):
+        max_workers = 1
+    if max_workers == 1 or len(files) < 2:
+        return [parse_file_result(file) for file in files]
+    workers = min(max_workers or os.cpu_count() or 1, len(files))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse_file_result, files, chunksize=max(1, len(files) // (workers * 4))))
+
+
+# Одне об'єднання в заздалегідь виділений масив замість pd.concat з приведенням типів
+def concat_records(arrays):
+    records = np.empty(sum(len(a) for a in arrays), dtype=RECORD_DTYPE)
+    position = 0
+    for array in arrays:
+        records[position:position + len(array)] = array
+        position += len(array)
+    return records
+
+
+# Записи всіх CSV у теці без очищення (ідентифікатори областей NOAA) та результати по файлах
+def load_vhi_files(folder_path, max_workers=None):
+    results = parse_files(sorted(glob.glob(folder_path + "/*.csv")), max_workers)
+    return concat_records([r.records for r in results if r.error is None]), results
+
+
+# Об'єднання областей: видалення дублікатів, виключених областей та перенумерація
+def clean_vhi_frame(frames):
+    result = pd.concat(frames).drop_duplicates().reset_index(drop=True)
+    result = result.loc[~result['region_id'].isin(EXCLUDED_REGIONS)]
+    remap = np.arange(max(REGION_REMAP) + 1, dtype=np.int16)
+    for old_id, new_id in REGION_REMAP.items():
+        remap[old_id] = new_id
+    result['region_id'] = remap[result['region_id'].to_numpy()]
+    return result.reset_index(drop=True)
+
+
+def _file_signature(file):
+    stat = os.stat(file)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _read_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'version': CACHE_VERSION, 'files': {}}
+    if manifest.get('version') != CACHE_VERSION:
+        return {'version': CACHE_VERSION, 'files': {}}
+    return manifest
+
+
+def _atomic_save(path, records):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, records)
+    os.replace(tmp_path, path)
+
+
+def _atomic_write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+# Завантаження типізованих записів з кешу, перечитуються лише змінені CSV файли.
+# Повертає записи та список невдалих FileResult; такі файли не потрапляють у маніфест
+# і розбираються знову під час наступного запуску
+def load_vhi_records(folder_path, cache_dir=None, max_workers=None):
+    cache_dir = cache_dir or os.path.join(folder_path, '.vhi_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+    combined_path = os.path.join(cache_dir, COMBINED_FILE)
+
+    manifest = _read_manifest(manifest_path)
+    cached_files = manifest['files']
+    csv_files = sorted(glob.glob(folder_path + "/*.csv"))
+
+    files = {}
+    stale = []
+    for file in csv_files:
+        name = os.path.basename(file)
+        signature = _file_signature(file)
+        entry = cached_files.get(name)
+        cache_path = os.path.join(cache_dir, name[:-len('.csv')] + '.npy')
+        if entry is None or entry['size'] != signature['size'] or \
+                entry['mtime_ns'] != signature['mtime_ns'] or not os.path.exists(cache_path):
+            stale.append((file, cache_path))
+        files[name] = dict(signature, cache=os.path.basename(cache_path))
+
+    if not stale and files.keys() == cached_files.keys() and os.path.exists(combined_path):
+        return np.load(combined_path, mmap_mode='r'), []
+
+    failures = []
+    cache_paths = dict(stale)
+    for result in parse_files(cache_paths, max_workers):
+        if result.error is None:
+            _atomic_save(cache_paths[result.path], result.records)
+        else:
+            failures.append(result)
+            del files[os.path.basename(result.path)]
+
+    for name in cached_files.keys() - files.keys():
+        try:
+            os.remove(os.path.join(cache_dir, cached_files[name]['cache']))
+        except OSError:
+            pass
+
+    records = concat_records([np.load(os.path.join(cache_dir, entry['cache']), mmap_mode='r')
+                              for entry in files.values()])
+    records = frame_to_records(clean_vhi_frame([records_to_frame(records)]))
+    _atomic_save(combined_path, records)
+    _atomic_write_json(manifest_path, {'version': CACHE_VERSION, 'files': files})
+    return records, failures
+
+
+# Невдалі файли спричиняють VhiLoadError зі списком результатів по файлах;
+# allow_partial=True повертає дані решти файлів
+def create_data_frame(folder_path, cache_dir=None, use_cache=True, max_workers=None, allow_partial=False):
+    if use_cache:
+        records, failures = load_vhi_records(folder_path, cache_dir, max_workers)
+        df = records_to_frame(records)
+    else:
+        records, results = load_vhi_files(folder_path, max_workers)
+        failures = [r for r in results if r.error is not None]
+        df = clean_vhi_frame([records_to_frame(records)])
+    if failures and not allow_partial:
+        raise VhiLoadError(failures)
+    return df
@@ -0,0 +1,138 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+NOAA_URL = "https://www.star.nesdis.noaa.gov/smcd/emb/vci/VH/get_TS_admin.php"
+DATA_PREFIX = '<tt><pre>'
+ENCODING = 'latin-1'
+
+DownloadResult = namedtuple('DownloadResult', ['province_id', 'path', 'rows_added', 'error'])
+
+
+# Відповідь без жодного рядка даних (порожня сторінка чи сторінка помилки з кодом 200)
+class EmptyResponseError(ValueError):
+    def __init__(self, province_id):
+        self.province_id = province_id
+        super().__init__(f"no data rows in the response for province {province_id}")
+
+
+# Сесія з пулом з'єднань та повторними спробами з експоненційною затримкою
+def create_session(pool_size=8, retries=3, backoff_factor=0.5):
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=backoff_factor,
+                  status_forcelist=(429, 500, 502, 503, 504), allowed_methods=('GET',))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Один канонічний файл на область замість нового файлу з часовою міткою на кожен запуск
+def canonical_path(folder_path, province_id):
+    return os.path.join(folder_path, f'vhi_id__{province_id}__mean.csv')
+
+
+def _parse_row(line):
+    fields = line[len(DATA_PREFIX):].split(',') if line.startswith(DATA_PREFIX) else line.split(',')
+    try:
+        return int(fields[0]), int(fields[1])
+    except (IndexError, ValueError):
+        return None
+
+
+# Розбиття відповіді NOAA на заголовок, рядки даних (рік, тиждень, рядок) та завершення
+def split_noaa_text(text):
+    header, rows, footer = [], [], []
+    for line in text.splitlines():
+        key = _parse_row(line)
+        if key is not None:
+            rows.append((key[0], key[1], line[len(DATA_PREFIX):] if line.startswith(DATA_PREFIX) else line))
+        elif rows:
+            footer.append(line)
+        else:
+            header.append(line)
+    return header, rows, footer
+
+
+def join_noaa_text(header, rows, footer):
+    lines = [line for _, _, line in rows]
+    if lines:
+        lines[0] = DATA_PREFIX + lines[0]
+    return '\n'.join(header + lines + footer) + '\n'
+
+
+def last_stored_week(text):
+    _, rows, _ = split_noaa_text(text)
+    return max((year, week) for year, week, _ in rows) if rows else None
+
+
+# Заміна збережених рядків, починаючи з from_year, свіжими рядками з NOAA;
+# відповідь без рядків даних залишає збережений текст без змін
+def merge_noaa_text(old_text, new_text, from_year):
+    header, old_rows, footer = split_noaa_text(old_text)
+    _, new_rows, _ = split_noaa_text(new_text)
+    if not new_rows:
+        return old_text, 0
+    rows = [row for row in old_rows if row[0] < from_year] + [row for row in new_rows if row[0] >= from_year]
+    return join_noaa_text(header, rows, footer), len(rows) - len(old_rows)
+
+
+def _atomic_write(path, text):
+    tmp_path = path + '.part'
+    with open(tmp_path, 'w', encoding=ENCODING, newline='') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def download_province(session, province_id, folder_path, year1=1981, year2=2024, base_url=NOAA_URL, timeout=30):
+    path = canonical_path(folder_path, province_id)
+    old_text = None
+    start_year = year1
+    if os.path.exists(path):
+        with open(path, encoding=ENCODING, newline='') as f:
+            old_text = f.read()
+        last = last_stored_week(old_text)
+        if last is None:
+            # Файл без рядків даних завантажується заново
+            old_text = None
+        else:
+            # API приймає лише роки, тому останній збережений рік запитується повторно;
+            # запит завжди починається з нього, щоб між збереженими та новими рядками
+            # не лишалося пропуску, а старіші рядки не відкидалися
+            start_year = last[0]
+
+    params = {'country': 'UKR', 'provinceID': province_id, 'year1': start_year, 'year2': year2, 'type': 'Mean'}
+    response = session.get(base_url, params=params, timeout=timeout)
+    response.raise_for_status()
+    new_text = response.content.decode(ENCODING)
+    _, rows, _ = split_noaa_text(new_text)
+    if not rows:
+        # Збережений файл не перезаписується
+        raise EmptyResponseError(province_id)
+
+    if old_text is None:
+        text, rows_added = new_text, len(rows)
+    else:
+        text, rows_added = merge_noaa_text(old_text, new_text, start_year)
+    _atomic_write(path, text)
+    return DownloadResult(province_id, path, rows_added, None)
+
+
+# Паралельне завантаження областей з обмеженою кількістю потоків; помилка однієї області
+# (мережа, файл, декодування, порожня відповідь) повертається в її DownloadResult
+def download_all(province_ids=range(1, 28), folder_path='download', max_workers=8, session=None, **kwargs):
+    os.makedirs(folder_path, exist_ok=True)
+    session = session or create_session(pool_size=max_workers)
+
+    def task(province_id):
+        try:
+            return download_province(session, province_id, folder_path, **kwargs)
+        except Exception as e:
+            return DownloadResult(province_id, canonical_path(folder_path, province_id), 0, e)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(task, province_ids))
@@ -0,0 +1,100 @@
+# Бенчмарк завантажувача VHI: послідовний розбір файлів проти пулу процесів на синтетичному
+# наборі з кількох сотень файлів областей у форматі NOAA.
+#
+# Приклад:
+#   python vhi_load_bench.py --files 27 300 --workers 1 2 4 8 auto --output bench_vhi_load.json
+#   python vhi_load_bench.py --files 27 300 --start-method spawn
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from bench_utils import measure
+from vhi_data import load_vhi_files
+
+FIRST_YEAR = 1982
+LAST_YEAR = 2024
+
+
+# Файл однієї області в тому вигляді, у якому його віддає сервер NOAA
+def write_synthetic_file(path, province_id, years, rng):
+    weeks = np.arange(1, 53)
+    lines = [f"<br>Province= {province_id}: Synthetic", "year,week, SMN,SMT,VCI,TCI,VHI<br>"]
+    for year in years:
+        smn = rng.random(len(weeks))
+        smt = rng.uniform(250, 300, len(weeks))
+        vci = rng.uniform(0, 100, len(weeks))
+        tci = rng.uniform(0, 100, len(weeks))
+        vhi = np.where(rng.random(len(weeks)) < 0.02, -1, (vci + tci) / 2)
+        lines.extend(f"{year},{w:3d},{a:.3f},{b:.2f},{c:6.2f},{d:6.2f},{e:6.2f},"
+                     for w, a, b, c, d, e in zip(weeks, smn, smt, vci, tci, vhi))
+    lines[2] = "<tt><pre>" + lines[2]
+    lines.append("</pre></tt>")
+    with open(path, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+
+
+# Кожен файл має власний province_id, як після завантаження кількох наборів областей
+def make_synthetic_folder(folder, files, years=range(FIRST_YEAR, LAST_YEAR + 1), seed=0):
+    rng = np.random.default_rng(seed)
+    for province_id in range(1, files + 1):
+        write_synthetic_file(os.path.join(folder, f"vhi_id__{province_id}__synthetic.csv"), province_id, years, rng)
+
+
+# workers=None - вибір за замовчуванням (послідовно до PARALLEL_MIN_FILES файлів)
+def run(files_list, workers_list, repeats=3, seed=0, log=print):
+    results = []
+    for files in files_list:
+        size_results = []
+        with tempfile.TemporaryDirectory() as folder:
+            make_synthetic_folder(folder, files, seed=seed)
+            for workers in workers_list:
+                loaded = []
+                timing = measure(lambda: loaded.append(load_vhi_files(folder, workers)), repeats, warmup=1,
+                                 track_memory=False)
+                records, file_results = loaded[-1]
+                size_results.append(dict(timing, files=files, workers=workers, rows=len(records),
+                                         failures=sum(r.error is not None for r in file_results)))
+
+        sequential = next((r['median'] for r in size_results if r['workers'] == 1), None)
+        for result in size_results:
+            result['speedup'] = sequential / result['median'] if sequential else None
+            speedup = f", x{result['speedup']:.2f}" if sequential else ""
+            workers = 'auto' if result['workers'] is None else result['workers']
+            log(f"{workers:>4} процесів, {files} файлів: median {result['median'] * 1e3:9.1f} ms{speedup}")
+        results.extend(size_results)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк паралельного завантаження VHI")
+    parser.add_argument('--files', nargs='+', type=int, default=[27, 300],
+                        help="кількість синтетичних файлів областей")
+    parser.add_argument('--workers', nargs='+', type=lambda value: None if value == 'auto' else int(value),
+                        default=[1, os.cpu_count() or 1, None],
+                        help="розміри пулу процесів, 1 - послідовний розбір, auto - вибір load_vhi_files")
+    parser.add_argument('--start-method', choices=multiprocessing.get_all_start_methods(), default=None)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.start_method:
+        multiprocessing.set_start_method(args.start_method, force=True)
+    results = run(args.files, args.workers, args.repeats, args.seed)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'cpu_count': os.cpu_count(),
+                       'start_method': multiprocessing.get_start_method(), 'results': results}, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
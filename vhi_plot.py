@@ -0,0 +1,88 @@
+import io
+from functools import lru_cache
+from queue import Queue
+
+import numpy as np
+import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from caching import LRUCache
+from instrumentation import stage
+
+# Побудова графіка VHI для lab_3 у байти PNG.
+#
+# Фігури створюються напряму через Figure та FigureCanvasAgg, без реєстрації в pyplot,
+# і беруться з невеликого пулу: після кожного рендеру фігура очищується й повертається
+# в пул, тому кількість фігур у процесі не зростає з кількістю запитів.
+
+FIGSIZE = (14, 7)
+POOL_SIZE = 2
+CACHE_MAXSIZE = 256
+CACHE_MAXBYTES = 64 * 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def year_colors(count):
+    return tuple(sns.color_palette("husl", count))
+
+
+# Розбиття відсортованих за роком і тижнем даних на неперервні ділянки окремих років
+def split_by_year(df):
+    years = df['Year'].to_numpy()
+    bounds = np.flatnonzero(years[1:] != years[:-1]) + 1
+    starts = np.concatenate(([0], bounds))
+    stops = np.concatenate((bounds, [len(years)]))
+    return [(years[start], start, stop) for start, stop in zip(starts, stops)] if len(years) else []
+
+
+def draw_plot(fig, df, parameter, title):
+    ax = fig.add_subplot()
+    weeks = df['Week'].to_numpy()
+    values = df[parameter].to_numpy()
+    parts = split_by_year(df)
+    colors = year_colors(len(parts))
+    for (year, start, stop), color in zip(parts, colors):
+        ax.plot(weeks[start:stop], values[start:stop], label=f"{parameter} - {year}", color=color)
+
+    ax.set_title(title, fontsize=16, fontweight='bold')
+    ax.set_xlabel("Тижні", fontsize=14)
+    ax.set_ylabel("Значення", fontsize=14)
+    ax.legend(title='Параметр і Рік', fontsize=12, title_fontsize=14)
+    ax.grid(True, linestyle='--', alpha=0.6)
+    return ax
+
+
+# Пул фігур з полотном Agg; get блокується, поки всі фігури зайняті
+class FigurePool:
+    def __init__(self, size=POOL_SIZE, figsize=FIGSIZE):
+        self._figures = Queue()
+        for _ in range(size):
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+            self._figures.put(fig)
+
+    def render_png(self, draw, *args):
+        fig = self._figures.get()
+        try:
+            with stage('vhi_plot.render'):
+                draw(fig, *args)
+            with stage('vhi_plot.serialize'):
+                buffer = io.BytesIO()
+                fig.savefig(buffer, format='png', bbox_inches='tight')
+            return buffer.getvalue()
+        finally:
+            # Осі, лінії та легенда звільняються одразу, фігура лишається для наступного запиту
+            fig.clear()
+            self._figures.put(fig)
+
+
+# Кеш готових PNG за нормалізованими параметрами запиту, обмежений кількістю та розміром
+class PlotRenderer:
+    def __init__(self, pool_size=POOL_SIZE, maxsize=CACHE_MAXSIZE, maxbytes=CACHE_MAXBYTES):
+        self.pool = FigurePool(pool_size)
+        self.cache = LRUCache(maxsize, maxbytes=maxbytes)
+
+    # load повертає (df, parameter, title) і викликається лише при промаху кешу
+    def png(self, key, load):
+        return self.cache.get_or_compute(key, lambda: self.pool.render_png(draw_plot, *load()))
@@ -0,0 +1,47 @@
+import numpy as np
+
+from caching import LRUCache
+
+# Множники для складеного ключа (регіон, рік, тиждень)
+REGION_STEP = 1_000_000
+YEAR_STEP = 100
+
+
+def make_keys(region_id, year, week):
+    return (np.asarray(region_id, dtype=np.int64) * REGION_STEP +
+            np.asarray(year, dtype=np.int64) * YEAR_STEP +
+            np.asarray(week, dtype=np.int64))
+
+
+# Індекс над даними VHI, відсортованими за регіоном, роком та тижнем.
+# Запит відповідає неперервним зрізам, знайденим через searchsorted.
+# Результати запитів спільні для таблиці та графіка, тому їх не можна змінювати.
+class VhiIndex:
+    def __init__(self, df, cache_size=256):
+        order = np.lexsort((df['Week'].to_numpy(), df['Year'].to_numpy(), df['region_id'].to_numpy()))
+        self.df = df.iloc[order].reset_index(drop=True)
+        self.keys = make_keys(self.df['region_id'].to_numpy(), self.df['Year'].to_numpy(),
+                              self.df['Week'].to_numpy())
+        self.min_week = int(self.df['Week'].min()) if len(self.df) else 0
+        self.max_week = int(self.df['Week'].max()) if len(self.df) else 0
+        self.cache = LRUCache(cache_size)
+
+    def positions(self, region_id, year_start, year_end, weeks_start, weeks_end):
+        if year_start > year_end or weeks_start > weeks_end:
+            return np.empty(0, dtype=np.intp)
+
+        years = np.arange(year_start, year_end + 1)
+        lo = np.searchsorted(self.keys, make_keys(region_id, years, weeks_start), side='left')
+        hi = np.searchsorted(self.keys, make_keys(region_id, years, weeks_end), side='right')
+        if weeks_start <= self.min_week and weeks_end >= self.max_week:
+            return np.arange(lo[0], hi[-1])
+
+        # Склеювання зрізів окремих років в один масив позицій без циклу
+        lengths = hi - lo
+        starts = np.cumsum(lengths) - lengths
+        return np.arange(lengths.sum()) + np.repeat(lo - starts, lengths)
+
+    def query(self, parameter, region_id, year_start, year_end, weeks_start, weeks_end):
+        key = (parameter, region_id, year_start, year_end, weeks_start, weeks_end)
+        return self.cache.get_or_compute(key, lambda: self.df[['Year', 'Week', parameter]].take(
+            self.positions(region_id, year_start, year_end, weeks_start, weeks_end)))